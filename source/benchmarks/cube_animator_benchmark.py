@@ -0,0 +1,82 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Compares the frames/sec of animating cubes the way LiveCube rotates a single cube, one xform op
+# set per cube per frame, against the CubeAnimator, which writes the arrays of a point instancer.
+# Both write to an in-memory stage, so only the cost of the USD edits is measured.
+#
+# python source/benchmarks/run_benchmark.py cube_animator_benchmark --cubes 1 100 1000 10000 --frames 100
+
+import argparse
+import random
+import time
+from pxr import Gf, Sdf, Usd, UsdGeom
+from omni.live import CubeAnimator
+
+
+class XformOpCubes:
+    # the LiveCube pattern for count cubes, one prim and one rotateXYZ op per cube
+    def __init__(self, stage, count):
+        self.ops = []
+        self.rotations = []
+        self.increments = []
+        for index in range(count):
+            cube = UsdGeom.Xform.Define(stage, f"/World/cube_{index}")
+            self.ops.append(cube.AddRotateXYZOp())
+            self.rotations.append(Gf.Vec3f(0.0))
+            self.increments.append(Gf.Vec3f(*(random.uniform(-1.0, 1.0) * 10.0 for _ in range(3))))
+
+    def animate(self):
+        with Sdf.ChangeBlock():
+            for op, rotation, increment in zip(self.ops, self.rotations, self.increments):
+                for axis in range(3):
+                    if abs(rotation[axis] + increment[axis]) > 360.0:
+                        increment[axis] *= -1.0
+                    rotation[axis] += increment[axis]
+                op.Set(rotation)
+
+
+def make_stage():
+    stage = Usd.Stage.CreateInMemory()
+    UsdGeom.Xform.Define(stage, "/World")
+    return stage
+
+
+def frames_per_second(animator, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        animator.animate()
+    return frames / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cubes", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'cubes':>8} {'xform ops fps':>14} {'instancer fps':>14} {'speedup':>8}")
+    for cubes in args.cubes:
+        # the xform ops and the specs don't keep their stage alive
+        xform_ops_stage, instancer_stage = make_stage(), make_stage()
+        xform_ops = frames_per_second(XformOpCubes(xform_ops_stage, cubes), args.frames)
+        instancer = frames_per_second(CubeAnimator(instancer_stage, cubes, seed=0), args.frames)
+        print(f"{cubes:>8} {xform_ops:>14.1f} {instancer:>14.1f} {instancer / xform_ops:>7.1f}x")
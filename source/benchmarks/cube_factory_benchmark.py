@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Compares the frames/sec of animating cubes the way LiveCube rotates a single cube, one xform op
+# Compares authoring cubes the way LiveCube did before the CubeFactory, a full mesh with its material
+# binding per cube, against the instanceable references of a CubeFactory. Prints the authoring time and
+# the size of the layer (usda) per cube, which should stay constant as the number of cubes grows.
+#
+# python source/benchmarks/run_benchmark.py cube_factory_benchmark --cubes 1 100 1000 10000
+
+import argparse
+import time
+from pxr import Gf, Usd, UsdGeom, UsdShade
+from omni.live import CubeFactory
+
+
+def author_meshes(stage, count):
+    # a copy of the cube mesh under every cube prim
+    material = UsdShade.Material.Define(stage, "/World/Looks/Plastic_Yellow_A")
+    # the mesh doesn't keep its stage alive
+    prototype_stage = Usd.Stage.CreateInMemory()
+    prototype = CubeFactory(prototype_stage).mesh.GetPrim()
+    attributes = [(attribute.GetName(), attribute.GetTypeName(), attribute.Get())
+                  for attribute in prototype.GetAuthoredAttributes()]
+    for index in range(count):
+        cube = UsdGeom.Xform.Define(stage, f"/World/grid/cube_{index}")
+        cube.AddTranslateOp().Set(Gf.Vec3d(index * 150.0, 0.0, 0.0))
+        mesh = UsdGeom.Mesh.Define(stage, cube.GetPath().AppendChild("mesh"))
+        for name, type_name, value in attributes:
+            mesh.GetPrim().CreateAttribute(name, type_name).Set(value)
+        mesh.GetPrim().ApplyAPI(UsdShade.MaterialBindingAPI)
+        UsdShade.MaterialBindingAPI(mesh).Bind(material)
+
+
+def author_instances(stage, count):
+    CubeFactory(stage).create_many("/World/grid", count)
+
+
+def measure(author, count):
+    """authoring time and layer size per cube"""
+    stage = Usd.Stage.CreateInMemory()
+    UsdGeom.Xform.Define(stage, "/World")
+    layer = stage.GetRootLayer()
+    empty_size = len(layer.ExportToString())
+    start = time.perf_counter()
+    author(stage, count)
+    elapsed = time.perf_counter() - start
+    return elapsed / count, (len(layer.ExportToString()) - empty_size) / count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cubes", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'cubes':>8} {'mesh us/cube':>13} {'mesh B/cube':>12} {'instance us/cube':>17} {'instance B/cube':>16}")
+    for cubes in args.cubes:
+        mesh_time, mesh_size = measure(author_meshes, cubes)
+        instance_time, instance_size = measure(author_instances, cubes)
+        print(
+            f"{cubes:>8} {mesh_time * 1e6:>13.1f} {mesh_size:>12.0f} "
+            f"{instance_time * 1e6:>17.1f} {instance_size:>16.0f}"
+        )
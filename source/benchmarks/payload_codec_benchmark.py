@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# pip install pandas
+# pip install msgpack
+
+# Compares the size and the encode and decode cost of the MQTT payload formats, including the
+# pretty printed JSON the MQTT ingest application used to publish. Every message carries the
+# readings of one device in one tick, decoding includes building the (attribute id, value) pairs.
+#
+# python source/benchmarks/run_benchmark.py payload_codec_benchmark --attributes 5 100 1000 --messages 2000
+
+import argparse
+import json
+import time
+from omni.live import IotCsvSchema, PlaybackMatrix, make_payload_codecs
+from synthetic_data import make_readings
+
+
+class PrettyJsonCodec:
+    name = "json indent"
+
+    def encode(self, items):
+        return json.dumps(dict(items), indent=2).encode("utf-8")
+
+    def decode(self, payload):
+        return json.loads(payload.decode()).items()
+
+
+def make_messages(matrix):
+    messages = []
+    attribute_ids = matrix.attribute_ids
+    for ts, (next_time, values) in enumerate(matrix):
+        columns, values = PlaybackMatrix.present(values)
+        items = [("_ts", float(ts))]
+        items.extend((attribute_ids[column], value) for column, value in zip(columns, values))
+        messages.append(items)
+    return messages
+
+
+def bench_codec(codec, messages):
+    start = time.perf_counter()
+    payloads = [codec.encode(items) for items in messages]
+    encode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for payload in payloads:
+        for id, value in codec.decode(payload):
+            pass
+    decode = time.perf_counter() - start
+    return sum(len(payload) for payload in payloads) / len(payloads), encode, decode
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attributes", type=int, nargs="+", default=[5, 100, 1000])
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(
+        f"{'attributes':>10} {'format':>12} {'bytes/msg':>10} {'encode us/msg':>14} "
+        f"{'decode us/msg':>14} {'decode msg/s':>13}"
+    )
+    for attributes in args.attributes:
+        matrix = PlaybackMatrix.from_frame(make_readings(attributes, args.messages), IotCsvSchema())
+        messages = make_messages(matrix)
+        codecs = [PrettyJsonCodec(), *make_payload_codecs(["_ts", *matrix.attribute_ids]).values()]
+        for codec in codecs:
+            size, encode, decode = bench_codec(codec, messages)
+            print(
+                f"{attributes:>10} {codec.name:>12} {size:>10.0f} {encode / len(messages) * 1e6:>14.2f} "
+                f"{decode / len(messages) * 1e6:>14.2f} {len(messages) / decode:>13.0f}"
+            )
@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# pip install pandas
+
+# Compares the startup cost of parsing the IoT CSV with memory mapping its PlaybackCache.
+# Reports the time to the first block, which is when the first write can happen, and the time
+# to read all the blocks.
+#
+# python source/benchmarks/run_benchmark.py playback_cache_benchmark --attributes 1000 --ticks 3600
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from omni.live import IotCsvReader
+from synthetic_data import make_readings, write_csv
+
+
+def bench(csv_path, cache):
+    start = time.perf_counter()
+    reader = IotCsvReader(csv_path, cache=cache)
+    first = None
+    ticks = 0
+    for matrix, new_ids in reader.blocks():
+        if first is None:
+            first = time.perf_counter() - start
+        ticks += len(matrix)
+    return first, time.perf_counter() - start, ticks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attributes", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=3600)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        csv_path = Path(folder) / "BENCHMARK_iot_data.csv"
+        write_csv(csv_path, make_readings(args.attributes, args.ticks))
+        size = csv_path.stat().st_size / (1 << 20)
+        print(f"{args.attributes} attributes, {args.ticks} ticks, {size:.1f} MiB csv")
+
+        print(f"{'run':>28} {'first block ms':>15} {'all blocks ms':>14}")
+        for name, cache in (
+            ("cold parse, no cache", False),
+            ("cold parse, building cache", True),
+            ("warm mmap", True),
+        ):
+            first, total, ticks = bench(csv_path, cache)
+            print(f"{name:>28} {first * 1000.0:>15.1f} {total * 1000.0:>14.1f}")
@@ -0,0 +1,74 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# pip install pandas
+
+# Compares the per tick cost of the iterrows playback loop with the precomputed PlaybackMatrix.
+# The sink only collects the values, so the numbers are the data side overhead of a tick without
+# the USD write.
+#
+# python source/benchmarks/run_benchmark.py playback_matrix_benchmark --attributes 1000 --ticks 300
+
+import argparse
+import time
+from omni.live import IotCsvSchema, PlaybackMatrix
+from synthetic_data import make_readings
+
+
+def bench_iterrows(data):
+    start = time.perf_counter()
+    for next_time, group in data.groupby("TimeStamp"):
+        payload = {}
+        for index, row in group.iterrows():
+            payload[row["Id"]] = row["Value"]
+    return time.perf_counter() - start
+
+
+def bench_matrix(data):
+    start = time.perf_counter()
+    matrix = PlaybackMatrix.from_frame(data, IotCsvSchema())
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    attribute_ids = matrix.attribute_ids
+    for next_time, values in matrix:
+        payload = {}
+        columns, values = PlaybackMatrix.present(values)
+        for column, value in zip(columns, values):
+            payload[attribute_ids[column]] = value
+    return build, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--attributes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--ticks", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'attributes':>10} {'iterrows ticks/s':>18} {'matrix ticks/s':>16} {'speedup':>8} {'build ms':>9}")
+    for attributes in args.attributes:
+        data = make_readings(attributes, args.ticks)
+        baseline = bench_iterrows(data)
+        build, playback = bench_matrix(data)
+        print(
+            f"{attributes:>10} {args.ticks / baseline:>18.1f} {args.ticks / playback:>16.1f} "
+            f"{baseline / playback:>7.1f}x {build * 1000.0:>9.1f}"
+        )
@@ -0,0 +1,46 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# pip install pandas
+
+import numpy as np
+import pandas as pd
+
+
+def make_readings(attributes, ticks, seed=0):
+    """
+    Generates long format IoT readings (TimeStamp, Id, Value) with a reading for
+    every attribute in every second
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range("2023-09-19 20:35:26", periods=ticks, freq="s", tz="UTC")
+    ids = np.array([f"Attribute_{i:04d}" for i in range(attributes)])
+    return pd.DataFrame(
+        {
+            "TimeStamp": np.repeat(timestamps, attributes),
+            "Id": np.tile(ids, ticks),
+            "Value": rng.normal(100.0, 10.0, ticks * attributes),
+        }
+    )
+
+
+def write_csv(path, data):
+    data.to_csv(path, index=False, date_format="%Y-%m-%d %H:%M:%S.%f%z")
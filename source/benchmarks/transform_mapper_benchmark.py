@@ -0,0 +1,112 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: MIT
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+# Compares the frames/sec of animating cubes the way LiveCube rotates a single cube, one xform op
+# Compares the frames/sec of driving the rotation of cubes with IoT values, evaluating and writing
+# every binding on its own with Usd, against the vectorized TransformMapper, which writes the changed
+# attributes in a single change block. Every cube has three bindings, one per rotation axis, and all
+# the values change on every frame.
+#
+# python source/benchmarks/run_benchmark.py transform_mapper_benchmark --cubes 10 100 1000 --frames 50
+
+import argparse
+import time
+import numpy as np
+from pxr import Usd, UsdGeom
+from omni.live import CubeFactory, TransformMapper, parse_transform_mappings
+
+
+class PerBindingMapper:
+    # a Usd read, modify and write of the target attribute per binding
+    def __init__(self, stage, mappings):
+        self.bindings = []
+        for mapping in mappings:
+            target, _, axis = mapping.target.partition(".")
+            prim = stage.GetPrimAtPath(mapping.prim)
+            attribute = prim.GetAttribute("xformOp:rotateXYZ")
+            if not attribute:
+                attribute = UsdGeom.Xformable(prim).AddRotateXYZOp().GetAttr()
+                attribute.Set((0.0, 0.0, 0.0))
+            self.bindings.append((mapping, attribute, "xyz".index(axis)))
+        self.values = {}
+
+    def update(self, device, attribute_ids, values):
+        for id, value in zip(attribute_ids, values):
+            self.values[(device, id)] = value
+
+    def write(self):
+        for mapping, attribute, axis in self.bindings:
+            value = self.values[(mapping.device, mapping.attribute)] * mapping.scale + mapping.offset
+            rotation = attribute.Get()
+            rotation[axis] = min(max(value, mapping.min), mapping.max)
+            attribute.Set(rotation)
+
+
+def make_stage(cubes):
+    stage = Usd.Stage.CreateInMemory()
+    UsdGeom.Xform.Define(stage, "/World")
+    CubeFactory(stage).create_many("/World/grid", cubes)
+    return stage
+
+
+def make_mappings(cubes):
+    rules = []
+    for index in range(cubes):
+        for axis in "xyz":
+            rules.append(
+                {
+                    "device": f"device_{index}",
+                    "attribute": f"value_{axis}",
+                    "prim": f"/World/grid/cube_{index}",
+                    "target": f"rotate.{axis}",
+                    "scale": 3.6,
+                    "max": 360.0,
+                }
+            )
+    return parse_transform_mappings(rules)
+
+
+def frames_per_second(mapper, cubes, frames):
+    rng = np.random.default_rng(0)
+    attribute_ids = ["value_x", "value_y", "value_z"]
+    inputs = rng.uniform(0.0, 100.0, (frames, cubes, 3))
+    start = time.perf_counter()
+    for frame in range(frames):
+        for index in range(cubes):
+            mapper.update(f"device_{index}", attribute_ids, inputs[frame, index])
+        mapper.write()
+    return frames / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cubes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'bindings':>8} {'per binding fps':>16} {'mapper fps':>11} {'speedup':>8}")
+    for cubes in args.cubes:
+        mappings = make_mappings(cubes)
+        # the attributes don't keep their stage alive
+        per_binding_stage, mapper_stage = make_stage(cubes), make_stage(cubes)
+        per_binding = frames_per_second(PerBindingMapper(per_binding_stage, mappings), cubes, args.frames)
+        mapper = frames_per_second(TransformMapper(mapper_stage, mappings), cubes, args.frames)
+        print(f"{len(mappings):>8} {per_binding:>16.1f} {mapper:>11.1f} {mapper / per_binding:>7.1f}x")
@@ -23,12 +23,36 @@
 
 import asyncio
 import os
+import time
 import omni.client
 from pxr import Usd, Sdf, Gf
 from pathlib import Path
 import pandas as pd
-import time
-from omni.live import LiveEditSession, LiveCube, getUserNameFromToken
+from omni.live import (
+    LiveEditSession,
+    LiveCube,
+    LogCapture,
+    create_storage,
+    AttributeWritePlan,
+    ChangeFilter,
+    CoalescingWriter,
+    ContentSync,
+    IotCheckpoint,
+    IotCsvReader,
+    IotCsvSchema,
+    ReplayClock,
+    ShardMetrics,
+    ShardSupervisor,
+    TimeSampleBackfill,
+    TransformMapper,
+    discover_device_topics,
+    load_transform_mappings,
+    merge_device_ticks,
+    parse_deadbands,
+    partition_devices,
+    parse_log_level,
+    getUserNameFromToken,
+)
 
 OMNI_HOST = os.environ.get("OMNI_HOST", "localhost")
 OMNI_USER = os.environ.get("OMNI_USER", "ov")
@@ -37,16 +61,69 @@ if OMNI_USER.lower() == "omniverse":
 elif OMNI_USER.lower() == "$omni-api-token":
     OMNI_USER = getUserNameFromToken(os.environ.get("OMNI_PASS"))
 
-BASE_FOLDER = "omniverse://" + OMNI_HOST + "/Users/" + OMNI_USER + "/iot-samples"
+# IOT_STORAGE=local[:folder] keeps the stage and the live session in a local folder instead of Nucleus,
+# e.g. to profile the connector offline, the live layer flushes are saved to disk
+STORAGE = create_storage(os.environ.get("IOT_STORAGE", "nucleus"), OMNI_USER)
+BASE_FOLDER = STORAGE.user_folder(OMNI_HOST, OMNI_USER) + "/iot-samples"
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 CONTENT_DIR = Path(SCRIPT_DIR).resolve().parents[1].joinpath("content")
+STAGE_NAME = "ConveyorBelt_A08_PR_NVD_01"
+
+# comma separated list of devices, defaults to the devices of all the content/*_iot_data.csv files
+IOT_DEVICES = os.environ.get("IOT_DEVICES")
+
+# explicit column types and timestamp format, set IOT_CSV_ENGINE=pyarrow to use the pyarrow parser
+CSV_SCHEMA = IotCsvSchema(
+    timestamp_format=os.environ.get("IOT_CSV_TIMESTAMP_FORMAT", "ISO8601"),
+    engine=os.environ.get("IOT_CSV_ENGINE", "c"),
+)
+# cache the parsed CSV next to the source for fast restarts, IOT_CSV_CACHE=0 disables it
+CSV_CACHE = os.environ.get("IOT_CSV_CACHE", "1").lower() in ("1", "true", "yes")
+
+# replay speed multiplier, IOT_REPLAY_MAX_RATE=1 replays as fast as possible
+REPLAY_SPEED = float(os.environ.get("IOT_REPLAY_SPEED", "1.0"))
+REPLAY_MAX_RATE = os.environ.get("IOT_REPLAY_MAX_RATE", "0").lower() in ("1", "true", "yes")
+
+# only write the values that moved past the deadband, |value - last| > max(absolute, relative * |last|),
+# IOT_DEADBANDS sets the deadbands per attribute: "id=absolute[:relative],..."
+DEADBAND_ABSOLUTE = float(os.environ.get("IOT_DEADBAND_ABSOLUTE", "0.0"))
+DEADBAND_RELATIVE = float(os.environ.get("IOT_DEADBAND_RELATIVE", "0.0"))
+DEADBANDS = parse_deadbands(os.environ.get("IOT_DEADBANDS"))
+
+# IOT_MAPPINGS is a JSON file of rules that drive the translation, rotation, scale and color of prims with
+# IoT attribute values, they are evaluated on every update and flushed together with the IoT values
+MAPPINGS_FILE = os.environ.get("IOT_MAPPINGS")
+
+# updates are merged and flushed to Nucleus at most once per frame budget
+FRAME_BUDGET = float(os.environ.get("IOT_FRAME_BUDGET_MS", "33")) / 1000.0
 
-messages = []
+# IOT_BACKFILL=1 writes the history as time samples instead of replaying it, optionally limited to the
+# IOT_BACKFILL_START/IOT_BACKFILL_END range (same timezone as the CSV) and written to the
+# IOT_BACKFILL_LAYER sublayer instead of the live layer
+BACKFILL = os.environ.get("IOT_BACKFILL", "0").lower() in ("1", "true", "yes")
+BACKFILL_START = os.environ.get("IOT_BACKFILL_START")
+BACKFILL_END = os.environ.get("IOT_BACKFILL_END")
+BACKFILL_LAYER = os.environ.get("IOT_BACKFILL_LAYER")
+BACKFILL_BATCH_TICKS = int(os.environ.get("IOT_BACKFILL_BATCH_TICKS", "3600"))
 
+# IOT_SHARDS > 1 partitions the devices across worker processes for the replay,
+# every worker writes to its own live sublayer that is composed by the root live layer
+SHARDS = int(os.environ.get("IOT_SHARDS", "1"))
 
-def log_handler(thread, component, level, message):
-    # print(message)
-    messages.append((thread, component, level, message))
+# the /iot prims are saved to the IOT_CHECKPOINT_LAYER next to the stage every IOT_CHECKPOINT_INTERVAL
+# seconds and restored from it on startup, IOT_CHECKPOINT=0 disables it
+CHECKPOINT = os.environ.get("IOT_CHECKPOINT", "1").lower() in ("1", "true", "yes")
+CHECKPOINT_INTERVAL = float(os.environ.get("IOT_CHECKPOINT_INTERVAL", "30"))
+CHECKPOINT_URL = f"{BASE_FOLDER}/{STAGE_NAME}/{os.environ.get('IOT_CHECKPOINT_LAYER', 'iot_checkpoint.usd')}"
+
+# number of concurrent uploads of the changed content files, unchanged files are skipped
+SYNC_WORKERS = int(os.environ.get("IOT_SYNC_WORKERS", "8"))
+
+# client log messages are kept in a ring buffer and printed on failure
+LOG_LEVEL = parse_log_level(os.environ.get("IOT_LOG_LEVEL", "warning"))
+LOG_CAPACITY = int(os.environ.get("IOT_LOG_CAPACITY", "1000"))
+LOG_RATE_LIMIT = int(os.environ.get("IOT_LOG_RATE_LIMIT", "100"))
+LOG_FILE = os.environ.get("IOT_LOG_FILE")
 
 
 def initialize_device_prim(live_layer, iot_topic):
@@ -64,110 +141,318 @@ def initialize_device_prim(live_layer, iot_topic):
     for attrib in iot_spec.attributes:
         iot_spec.RemoveProperty(attrib)
 
-    IOT_TOPIC_DATA = f"{CONTENT_DIR}/{iot_topic}_iot_data.csv"
-    data = pd.read_csv(IOT_TOPIC_DATA)
-    data.head()
-
-    # create all the IoT attributes that will be written
+    # create the timestamp attribute, the IoT attributes are created
+    # as they are discovered while streaming the CSV
     attr = Sdf.AttributeSpec(iot_spec, "_ts", Sdf.ValueTypeNames.Double)
     if not attr:
-        raise Exception(f"Could not define the attribute: {attrName}")
+        raise Exception("Could not define the attribute: _ts")
 
-    # infer the unique data points in the CSV.
-    # The values may be known in advance and can be hard coded
-    grouped = data.groupby("Id")
-    for attrName, group in grouped:
-        attr = Sdf.AttributeSpec(iot_spec, attrName, Sdf.ValueTypeNames.Double)
-        if not attr:
-            raise Exception(f"Could not define the attribute: {attrName}")
+
+def remove_device_prims(live_layer, iot_topics):
+    # the shard layers are sublayers of the root live layer, so the values left in it by an earlier run
+    # that was not sharded would hide the values written by the shard workers
+    iot_root = live_layer.GetPrimAtPath("/iot")
+    if not iot_root:
+        return
+    for iot_topic in iot_topics:
+        if iot_root.nameChildren.get(iot_topic):
+            del iot_root.nameChildren[iot_topic]
 
 
-async def initialize_async(iot_topic):
-    # copy a the Conveyor Belt to the target nucleus server
-    stage_name = f"ConveyorBelt_{iot_topic}"
-    local_folder = f"file:{CONTENT_DIR}/{stage_name}"
+def initialize_device_attributes(live_layer, iot_topic, attribute_ids):
+    iot_spec = live_layer.GetPrimAtPath(f"/iot/{iot_topic}")
+    with Sdf.ChangeBlock():
+        for attrName in attribute_ids:
+            # the attribute may have been restored from the checkpoint
+            if live_layer.GetAttributeAtPath(iot_spec.path.AppendProperty(attrName)):
+                continue
+            attr = Sdf.AttributeSpec(iot_spec, attrName, Sdf.ValueTypeNames.Double)
+            if not attr:
+                raise Exception(f"Could not define the attribute: {attrName}")
+
+
+async def initialize_async(iot_topics):
+    # upload the changed files of the Conveyor Belt to the target nucleus server
+    stage_name = STAGE_NAME
+    local_folder = CONTENT_DIR.joinpath(stage_name)
     stage_folder = f"{BASE_FOLDER}/{stage_name}"
     stage_url = f"{stage_folder}/{stage_name}.usd"
-    result = await omni.client.copy_async(
-        local_folder,
-        stage_folder,
-        behavior=omni.client.CopyBehavior.ERROR_IF_EXISTS,
-        message="Copy Conveyor Belt",
-    )
+    content_sync = ContentSync(local_folder, stage_folder, SYNC_WORKERS, "Copy Conveyor Belt", STORAGE)
+    print(f"Content sync: {await content_sync.run()}")
+    if content_sync.kept_paths:
+        print(f"Kept the files changed on the server: {', '.join(content_sync.kept_paths)}")
 
-    stage = Usd.Stage.Open(stage_url)
+    # open the stage while the live session is set up
+    live_session = LiveEditSession(stage_url, STORAGE)
+    stage, live_layer = await asyncio.gather(
+        asyncio.get_running_loop().run_in_executor(None, Usd.Stage.Open, stage_url),
+        live_session.ensure_exists(),
+    )
     if not stage:
         raise Exception(f"Could load the stage {stage_url}.")
 
-    live_session = LiveEditSession(stage_url)
-    live_layer = await live_session.ensure_exists()
-
     session_layer = stage.GetSessionLayer()
     session_layer.subLayerPaths.append(live_layer.identifier)
 
     # set the live layer as the edit target
     stage.SetEditTarget(live_layer)
-    initialize_device_prim(live_layer, iot_topic)
+    shard_urls = []
+    if SHARDS > 1 and not BACKFILL:
+        # the device prims are created by the workers in the layers of their shards
+        shard_urls = await live_session.ensure_shard_layers(live_layer, SHARDS)
+        with Sdf.ChangeBlock():
+            remove_device_prims(live_layer, iot_topics)
+    else:
+        # the shard layers of an earlier sharded run would hide the values written to the root live layer
+        live_session.remove_shard_layers(live_layer)
+        with Sdf.ChangeBlock():
+            for iot_topic in iot_topics:
+                initialize_device_prim(live_layer, iot_topic)
 
     # place the cube on the conveyor
     live_cube = LiveCube(stage)
     live_cube.scale(Gf.Vec3f(0.5))
     live_cube.translate(Gf.Vec3f(100.0, -30.0, 195.0))
-    omni.client.live_process()
-    return stage, live_layer
+    STORAGE.live_process()
+    return stage, live_layer, shard_urls
 
 
-def write_to_live(live_layer, iot_topic, group, ts):
-    # write the iot values to the usd prim attributes
-    print(group.iloc[0]["TimeStamp"])
-    ts_attribute = live_layer.GetAttributeAtPath(f"/iot/{iot_topic}._ts")
-    ts_attribute.default = ts
-    with Sdf.ChangeBlock():
-        for index, row in group.iterrows():
-            id = row["Id"]
-            value = row["Value"]
-            attr = live_layer.GetAttributeAtPath(f"/iot/{iot_topic}.{id}")
-            if not attr:
-                raise Exception(f"Could not find attribute /iot/{iot_topic}.{id}.")
-            attr.default = value
-    omni.client.live_process()
+def write_to_live(writer, write_plans, change_filters, ticks, timestamp, ts, mapper=None):
+    # write the changed iot values of all the devices in a single tick to the usd prim attributes
+    print(timestamp)
+    for tick in ticks:
+        columns, values = change_filters[tick.topic].filter(tick.values)
+        writer.update_columns(write_plans[tick.topic], columns, values, ts)
+        if mapper is not None:
+            mapper.update(tick.topic, tick.attribute_ids, tick.values)
+    if mapper is not None:
+        mapper.apply(writer)
+    writer.flush_if_due()
+
+
+def restore_checkpoint(checkpoint, change_filters):
+    # show the checkpointed values right away, they are only written again once they changed
+    restored = checkpoint.restore()
+    for iot_topic, items in restored.items():
+        if iot_topic in change_filters:
+            change_filters[iot_topic].seed(items)
+    STORAGE.live_process()
+    print(f"Restored {checkpoint.stats.restored} values of {len(restored)} devices from {checkpoint.url}")
+
+
+def run(stage, live_layer, iot_topics, checkpoint_url=CHECKPOINT_URL):
+    # every file contains the data for a single device
+    readers = {}
+    write_plans = {}
+    change_filters = {}
+    for iot_topic in iot_topics:
+        readers[iot_topic] = IotCsvReader(f"{CONTENT_DIR}/{iot_topic}_iot_data.csv", CSV_SCHEMA, cache=CSV_CACHE)
+        write_plans[iot_topic] = AttributeWritePlan(live_layer, f"/iot/{iot_topic}", [])
+        change_filters[iot_topic] = ChangeFilter(DEADBAND_ABSOLUTE, DEADBAND_RELATIVE, DEADBANDS)
+        # a reloaded live layer has lost the values that would be suppressed as unchanged
+        write_plans[iot_topic].content_replaced_callbacks.append(change_filters[iot_topic].reset)
+
+    checkpoint = None
+    if CHECKPOINT:
+        checkpoint = IotCheckpoint(live_layer, checkpoint_url, CHECKPOINT_INTERVAL)
+        restore_checkpoint(checkpoint, change_filters)
 
+    # the shard workers have no stage, IOT_MAPPINGS is rejected with IOT_SHARDS on startup
+    mapper = None
+    if MAPPINGS_FILE and stage is not None:
+        mapper = TransformMapper(stage, load_transform_mappings(MAPPINGS_FILE))
+        STORAGE.live_process()
 
-def run(stage, live_layer, iot_topic):
-    # we assume that the file contains the data for single device
-    IOT_TOPIC_DATA = f"{CONTENT_DIR}/{iot_topic}_iot_data.csv"
-    data = pd.read_csv(IOT_TOPIC_DATA)
-    data.head()
+    clock = ReplayClock(REPLAY_SPEED, REPLAY_MAX_RATE)
+    writer = CoalescingWriter(FRAME_BUDGET, STORAGE.live_process)
+    start_time = None
 
-    # Converting to DateTime Format and drop ms
-    data["TimeStamp"] = pd.to_datetime(data["TimeStamp"])
-    data["TimeStamp"] = data["TimeStamp"].dt.floor("s")
+    # play back the data of all the devices on a single timeline while the files are streamed
+    for next_time, ticks in merge_device_ticks(readers):
+        for tick in ticks:
+            if tick.new_ids:
+                initialize_device_attributes(live_layer, tick.topic, tick.new_ids)
+                write_plans[tick.topic].add(tick.new_ids)
+                change_filters[tick.topic].add(tick.new_ids)
 
-    data.set_index("TimeStamp")
-    start_time = data.min()["TimeStamp"]
-    last_time = start_time
-    grouped = data.groupby("TimeStamp")
+        if start_time is None:
+            start_time = next_time
+            clock.start()
 
-    # play back the data in real-time
-    for next_time, group in grouped:
-        diff = (next_time - last_time).total_seconds()
-        if diff > 0:
-            time.sleep(diff)
-        write_to_live(live_layer, iot_topic, group, (next_time - start_time).total_seconds())
-        last_time = next_time
+        ts = (next_time - start_time).total_seconds()
+        # no update arrives while the clock sleeps, flush the pending values at the end of their frame
+        # instead of leaving them stale until the next tick
+        due = writer.time_until_due()
+        if writer.pending and clock.delay(ts) > due:
+            time.sleep(due)
+            writer.flush()
+        clock.wait(ts)
+        write_to_live(writer, write_plans, change_filters, ticks, next_time, ts, mapper)
+        if checkpoint is not None:
+            checkpoint.checkpoint_if_due()
+
+    writer.flush()
+    if checkpoint is not None:
+        checkpoint.close()
+        print(f"Checkpoints - {checkpoint.stats}")
+    for write_plan in write_plans.values():
+        write_plan.revoke()
+    if mapper is not None:
+        mapper.revoke()
+        print(f"Transform mappings - {mapper.stats}")
+    print(f"Replay finished - {clock.stats}")
+    print(f"Live writes - {writer.stats}")
+    print(f"Storage {STORAGE.name} - {STORAGE.stats}")
+    print_suppression(change_filters)
+    return clock.stats, writer.stats
+
+
+def shard_checkpoint_url(shard):
+    # e.g. iot_checkpoint_shard_0.usd next to the checkpoint of the unsharded replay
+    root, extension = os.path.splitext(CHECKPOINT_URL)
+    return f"{root}_shard_{shard}{extension}"
+
+
+def run_shard(shard, shard_url, iot_topics, metrics):
+    # entry point of the worker processes, every worker has its own client and writes its devices
+    # to the live sublayer of its shard, and restores and saves them in the checkpoint of its shard
+    log_capture = LogCapture(LOG_CAPACITY, LOG_LEVEL, LOG_RATE_LIMIT, LOG_FILE)
+    omni.client.initialize()
+    log_capture.install()
+    try:
+        shard_layer = STORAGE.find_or_open_layer(shard_url)
+        if not shard_layer:
+            raise Exception(f"Could load the shard layer {shard_url}.")
+        with Sdf.ChangeBlock():
+            for iot_topic in iot_topics:
+                initialize_device_prim(shard_layer, iot_topic)
+        STORAGE.live_process()
+
+        replay_stats, coalescing_stats = run(None, shard_layer, iot_topics, shard_checkpoint_url(shard))
+        metrics.put(ShardMetrics(shard, iot_topics, replay_stats, coalescing_stats))
+    except:
+        log_capture.dump()
+        raise
+    finally:
+        log_capture.close()
+        omni.client.shutdown()
+
+
+def run_sharded(shard_urls, iot_topics):
+    # balance the shards by the size of the data of their devices
+    sizes = {iot_topic: os.path.getsize(f"{CONTENT_DIR}/{iot_topic}_iot_data.csv") for iot_topic in iot_topics}
+    shards = partition_devices(sizes, len(shard_urls))
+    supervisor = ShardSupervisor(run_shard, list(zip(shard_urls, shards)))
+    metrics = supervisor.run()
+
+    for shard_metrics in metrics:
+        print(shard_metrics)
+    written = sum(shard_metrics.written for shard_metrics in metrics)
+    elapsed = max(shard_metrics.elapsed for shard_metrics in metrics)
+    rate = written / elapsed if elapsed > 0.0 else 0.0
+    print(f"Sharded replay finished - shards: {len(metrics)}, values written: {written}, rate: {rate:.1f} values/s")
+
+
+def print_suppression(change_filters):
+    offered = sum(change_filter.offered for change_filter in change_filters.values())
+    written = sum(change_filter.written for change_filter in change_filters.values())
+    ratio = 1.0 - written / offered if offered else 0.0
+    print(f"Values offered: {offered}, written: {written}, suppressed: {ratio:.1%}")
+
+
+def open_backfill_layer(stage, layer_name):
+    # open or create the sublayer next to the stage, and add it to the stage
+    root_layer = stage.GetRootLayer()
+    layer_url = omni.client.combine_urls(root_layer.identifier, layer_name)
+    layer = STORAGE.find_or_open_layer(layer_url)
+    if not layer:
+        layer = STORAGE.create_layer(layer_url)
+        if not layer:
+            raise Exception(f"Could load the backfill layer {layer_url}.")
+
+    if layer.identifier not in root_layer.subLayerPaths:
+        root_layer.subLayerPaths.append(layer.identifier)
+        root_layer.Save()
+    return layer
+
+
+def backfill(stage, live_layer, iot_topics):
+    layer = live_layer
+    if BACKFILL_LAYER:
+        # keep the bulk writes out of the live session
+        layer = open_backfill_layer(stage, BACKFILL_LAYER)
+        with Sdf.ChangeBlock():
+            for iot_topic in iot_topics:
+                initialize_device_prim(layer, iot_topic)
+
+    readers = {
+        iot_topic: IotCsvReader(f"{CONTENT_DIR}/{iot_topic}_iot_data.csv", CSV_SCHEMA, cache=CSV_CACHE)
+        for iot_topic in iot_topics
+    }
+    start = pd.Timestamp(BACKFILL_START) if BACKFILL_START else None
+    end = pd.Timestamp(BACKFILL_END) if BACKFILL_END else None
+    writer = None
+
+    for next_time, ticks in merge_device_ticks(readers):
+        # new ids are only reported once, create the attributes even for the ticks outside of the range
+        for tick in ticks:
+            if tick.new_ids:
+                initialize_device_attributes(layer, tick.topic, tick.new_ids)
+
+        if (start is not None and next_time < start) or (end is not None and next_time > end):
+            continue
+
+        if writer is None:
+            writer = TimeSampleBackfill(layer, next_time, stage.GetTimeCodesPerSecond())
+        for tick in ticks:
+            writer.add(tick)
+
+        if writer.pending_ticks >= BACKFILL_BATCH_TICKS:
+            writer.flush()
+            print(f"{next_time} - {writer.samples_written} samples written")
+            if layer == live_layer:
+                STORAGE.live_process()
+
+    if writer is None:
+        print("No data in the backfill range")
+        return
+
+    writer.flush()
+    # the stage only reads its time range from the root and the session layer, the root layer of the
+    # stage is saved with the backfill sublayer, the session layer covers the backfill of the live layer
+    range_layer = stage.GetSessionLayer() if layer == live_layer else stage.GetRootLayer()
+    range_layer.startTimeCode = writer.start_time_code
+    range_layer.endTimeCode = writer.end_time_code
+    if layer == live_layer:
+        STORAGE.live_process()
+    else:
+        layer.Save()
+        range_layer.Save()
+    print(
+        f"Backfill finished - {writer.samples_written} samples, "
+        f"time codes {writer.start_time_code} to {writer.end_time_code}"
+    )
 
 
 if __name__ == "__main__":
-    IOT_TOPIC = "A08_PR_NVD_01"
+    if MAPPINGS_FILE and SHARDS > 1 and not BACKFILL:
+        raise Exception(
+            "IOT_MAPPINGS can't be combined with IOT_SHARDS, the shard workers have no stage to drive the mapped prims."
+        )
+    IOT_TOPICS = IOT_DEVICES.split(",") if IOT_DEVICES else discover_device_topics(CONTENT_DIR)
+    log_capture = LogCapture(LOG_CAPACITY, LOG_LEVEL, LOG_RATE_LIMIT, LOG_FILE)
     omni.client.initialize()
-    omni.client.set_log_level(omni.client.LogLevel.DEBUG)
-    omni.client.set_log_callback(log_handler)
+    log_capture.install()
     try:
-        stage, live_layer = asyncio.run(initialize_async(IOT_TOPIC))
-        run(stage, live_layer, IOT_TOPIC)
+        stage, live_layer, shard_urls = asyncio.run(initialize_async(IOT_TOPICS))
+        if BACKFILL:
+            backfill(stage, live_layer, IOT_TOPICS)
+        elif shard_urls:
+            run_sharded(shard_urls, IOT_TOPICS)
+        else:
+            run(stage, live_layer, IOT_TOPICS)
     except:
-        print("---- LOG MESSAGES ---")
-        print(*messages, sep="\n")
-        print("----")
+        log_capture.dump()
     finally:
+        log_capture.close()
         omni.client.shutdown()
@@ -29,7 +29,17 @@ parser.add_argument("--username", "-u", default=default_username)
 parser.add_argument("--password", "-p", default=default_password)
 parser.add_argument("--config", "-c", choices=["debug", "release"], default="release")
 parser.add_argument("--platform", default=CURRENT_PLATFORM)
+parser.add_argument("--speed", type=float, help="replay speed multiplier, e.g. 10 for 10x")
+parser.add_argument("--max-rate", action="store_true", help="replay as fast as possible")
+parser.add_argument("--shards", type=int, help="number of worker processes the devices are partitioned across")
+parser.add_argument("--devices", help="comma separated list of devices, defaults to all the content csv files")
+parser.add_argument("--backfill", action="store_true", help="write the history as time samples instead of replaying")
+parser.add_argument("--backfill-layer", help="sublayer next to the stage to backfill, defaults to the live layer")
+parser.add_argument("--storage", help='"local[:folder]" keeps the stage and the live session in a local folder')
+parser.add_argument("--mappings", help="JSON file of rules that drive the transforms of prims with iot values")
 args = parser.parse_args()
+if args.mappings and args.shards is not None and args.shards > 1 and not args.backfill:
+    parser.error("--mappings can't be combined with --shards, the shard workers have no stage to drive the prims")
 
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 ROOT_DIR = Path(SCRIPT_DIR).resolve().parents[1]
@@ -63,6 +73,22 @@ os.environ["PYTHONPATH"] = os.pathsep + os.pathsep.join(EXTRA_PYTHON_PATHS)
 os.environ["OMNI_USER"] = args.username
 os.environ["OMNI_PASS"] = args.password
 os.environ["OMNI_HOST"] = args.server
+if args.storage:
+    os.environ["IOT_STORAGE"] = args.storage
+if args.mappings:
+    os.environ["IOT_MAPPINGS"] = os.path.abspath(args.mappings)
+if args.speed is not None:
+    os.environ["IOT_REPLAY_SPEED"] = str(args.speed)
+if args.max_rate:
+    os.environ["IOT_REPLAY_MAX_RATE"] = "1"
+if args.devices:
+    os.environ["IOT_DEVICES"] = args.devices
+if args.shards is not None:
+    os.environ["IOT_SHARDS"] = str(args.shards)
+if args.backfill:
+    os.environ["IOT_BACKFILL"] = "1"
+if args.backfill_layer:
+    os.environ["IOT_BACKFILL_LAYER"] = args.backfill_layer
 
 if PLATFORM_SYSTEM == "windows":
     PYTHON_EXE = DEPS_DIR.joinpath("python", "python")
@@ -28,11 +28,36 @@ import omni.client
 from pxr import Usd, Sdf, Gf
 from pathlib import Path
 import pandas as pd
-import time
-from paho.mqtt import client as mqtt_client
 import random
-import json
-from omni.live import LiveEditSession, LiveCube, getUserNameFromToken
+from omni.live import (
+    AttributeSchemaCache,
+    LiveEditSession,
+    LiveCube,
+    LogCapture,
+    create_storage,
+    AttributeWritePlan,
+    ChangeFilter,
+    CoalescingWriter,
+    ContentSync,
+    IotCheckpoint,
+    IotCsvReader,
+    IotCsvSchema,
+    LatestValueQueue,
+    LoopbackBroker,
+    PahoTransport,
+    PlaybackMatrix,
+    ReplayClock,
+    TopicRouter,
+    TransformMapper,
+    discover_device_topics,
+    load_transform_mappings,
+    make_payload_codecs,
+    merge_device_ticks_async,
+    payload_topic,
+    parse_deadbands,
+    parse_log_level,
+    getUserNameFromToken,
+)
 
 OMNI_HOST = os.environ.get("OMNI_HOST", "localhost")
 OMNI_USER = os.environ.get("OMNI_USER", "ov")
@@ -41,20 +66,81 @@ if OMNI_USER.lower() == "omniverse":
 elif OMNI_USER.lower() == "$omni-api-token":
     OMNI_USER = getUserNameFromToken(os.environ.get("OMNI_PASS"))
 
-BASE_FOLDER = "omniverse://" + OMNI_HOST + "/Users/" + OMNI_USER + "/iot-samples"
+# IOT_STORAGE=local[:folder] keeps the stage and the live session in a local folder instead of Nucleus,
+# e.g. to profile the connector offline, the live layer flushes are saved to disk
+STORAGE = create_storage(os.environ.get("IOT_STORAGE", "nucleus"), OMNI_USER)
+BASE_FOLDER = STORAGE.user_folder(OMNI_HOST, OMNI_USER) + "/iot-samples"
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 CONTENT_DIR = Path(SCRIPT_DIR).resolve().parents[1].joinpath("content")
-
-messages = []
-
-
-def log_handler(thread, component, level, message):
-    # print(message)
-    messages.append((thread, component, level, message))
+STAGE_NAME = "ConveyorBelt_A08_PR_NVD_01"
+
+# comma separated list of devices, defaults to the devices of all the content/*_iot_data.csv files
+IOT_DEVICES = os.environ.get("IOT_DEVICES")
+
+# explicit column types and timestamp format, set IOT_CSV_ENGINE=pyarrow to use the pyarrow parser
+CSV_SCHEMA = IotCsvSchema(
+    timestamp_format=os.environ.get("IOT_CSV_TIMESTAMP_FORMAT", "ISO8601"),
+    engine=os.environ.get("IOT_CSV_ENGINE", "c"),
+)
+# cache the parsed CSV next to the source for fast restarts, IOT_CSV_CACHE=0 disables it
+CSV_CACHE = os.environ.get("IOT_CSV_CACHE", "1").lower() in ("1", "true", "yes")
+
+# replay speed multiplier, IOT_REPLAY_MAX_RATE=1 replays as fast as possible
+REPLAY_SPEED = float(os.environ.get("IOT_REPLAY_SPEED", "1.0"))
+REPLAY_MAX_RATE = os.environ.get("IOT_REPLAY_MAX_RATE", "0").lower() in ("1", "true", "yes")
+
+# only write the values that moved past the deadband, |value - last| > max(absolute, relative * |last|),
+# IOT_DEADBANDS sets the deadbands per attribute: "id=absolute[:relative],..."
+DEADBAND_ABSOLUTE = float(os.environ.get("IOT_DEADBAND_ABSOLUTE", "0.0"))
+DEADBAND_RELATIVE = float(os.environ.get("IOT_DEADBAND_RELATIVE", "0.0"))
+DEADBANDS = parse_deadbands(os.environ.get("IOT_DEADBANDS"))
+
+# updates are merged and flushed to Nucleus at most once per frame budget
+FRAME_BUDGET = float(os.environ.get("IOT_FRAME_BUDGET_MS", "33")) / 1000.0
+# maximum number of attribute values waiting for the next flush, new attributes are dropped beyond it
+QUEUE_CAPACITY = int(os.environ.get("IOT_QUEUE_CAPACITY", "100000"))
+
+# IOT_MAPPINGS is a JSON file of rules that drive the translation, rotation, scale and color of prims with
+# IoT attribute values, they are evaluated on every update and flushed together with the IoT values
+MAPPINGS_FILE = os.environ.get("IOT_MAPPINGS")
+
+# payload format of the published messages, json, msgpack (pip install msgpack) or bin,
+# the subscriber detects the format of a message from its fmt/{format} topic suffix
+PAYLOAD_FORMAT = os.environ.get("IOT_PAYLOAD_FORMAT", "json")
+
+# comma separated mqtt topic filters, messages of unknown devices create their /iot/<device> prim,
+# by default only the topics of the configured devices are subscribed, e.g. iot/# opts in to discovery
+SUBSCRIPTIONS = [topic_filter for topic_filter in os.environ.get("IOT_SUBSCRIPTIONS", "").split(",") if topic_filter]
+
+# host[:port] of the mqtt broker, "loopback" uses an in-process broker for offline load tests
+MQTT_BROKER = os.environ.get("IOT_MQTT_BROKER", "test.mosquitto.org:1883")
+MQTT_QOS = int(os.environ.get("IOT_MQTT_QOS", "0"))
+# after the replay a marker is published on a topic of this connector and the messages of the last ticks
+# are drained until it comes back, the broker forwards the messages of a connection in order
+DRAIN_TOPIC = f"iot-samples/drain/{random.randint(0, 1_000_000)}"
+DRAIN_TIMEOUT = float(os.environ.get("IOT_MQTT_DRAIN_TIMEOUT", "10"))
+
+# the /iot prims are saved to the IOT_CHECKPOINT_LAYER next to the stage every IOT_CHECKPOINT_INTERVAL
+# seconds and restored from it on startup, IOT_CHECKPOINT=0 disables it
+CHECKPOINT = os.environ.get("IOT_CHECKPOINT", "1").lower() in ("1", "true", "yes")
+CHECKPOINT_INTERVAL = float(os.environ.get("IOT_CHECKPOINT_INTERVAL", "30"))
+CHECKPOINT_URL = f"{BASE_FOLDER}/{STAGE_NAME}/{os.environ.get('IOT_CHECKPOINT_LAYER', 'iot_checkpoint.usd')}"
+
+# number of concurrent uploads of the changed content files, unchanged files are skipped
+SYNC_WORKERS = int(os.environ.get("IOT_SYNC_WORKERS", "8"))
+
+# client log messages are kept in a ring buffer and printed on failure
+LOG_LEVEL = parse_log_level(os.environ.get("IOT_LOG_LEVEL", "warning"))
+LOG_CAPACITY = int(os.environ.get("IOT_LOG_CAPACITY", "1000"))
+LOG_RATE_LIMIT = int(os.environ.get("IOT_LOG_RATE_LIMIT", "100"))
+LOG_FILE = os.environ.get("IOT_LOG_FILE")
 
 
 def initialize_device_prim(live_layer, iot_topic):
     iot_root = live_layer.GetPrimAtPath("/iot")
+    if not iot_root:
+        iot_root = Sdf.PrimSpec(live_layer, "iot", Sdf.SpecifierDef, "IoT Root")
+
     iot_spec = live_layer.GetPrimAtPath(f"/iot/{iot_topic}")
     if not iot_spec:
         iot_spec = Sdf.PrimSpec(iot_root, iot_topic, Sdf.SpecifierDef, "ConveyorBelt Type")
@@ -65,156 +151,292 @@ def initialize_device_prim(live_layer, iot_topic):
     for attrib in iot_spec.attributes:
         iot_spec.RemoveProperty(attrib)
 
-    IOT_TOPIC_DATA = f"{CONTENT_DIR}/{iot_topic}_iot_data.csv"
-    data = pd.read_csv(IOT_TOPIC_DATA)
-    data.head()
-
-    # create all the IoT attributes that will be written
+    # create the timestamp attribute, the IoT attributes are created by initialize_device_attributes
     attr = Sdf.AttributeSpec(iot_spec, "_ts", Sdf.ValueTypeNames.Double)
     if not attr:
-        raise Exception(f"Could not define the attribute: {attrName}")
+        raise Exception("Could not define the attribute: _ts")
 
-    # infer the unique data points in the CSV.
-    # The values may be known in advance and can be hard coded
-    grouped = data.groupby("Id")
-    for attrName, group in grouped:
-        attr = Sdf.AttributeSpec(iot_spec, attrName, Sdf.ValueTypeNames.Double)
-        if not attr:
-            raise Exception(f"Could not define the attribute: {attrName}")
 
+def initialize_device_attributes(live_layer, iot_topic, attribute_ids):
+    iot_spec = live_layer.GetPrimAtPath(f"/iot/{iot_topic}")
+    with Sdf.ChangeBlock():
+        for attrName in attribute_ids:
+            attr = Sdf.AttributeSpec(iot_spec, attrName, Sdf.ValueTypeNames.Double)
+            if not attr:
+                raise Exception(f"Could not define the attribute: {attrName}")
 
-async def initialize_async(iot_topic):
-    # copy a the Conveyor Belt to the target nucleus server
-    stage_name = f"ConveyorBelt_{iot_topic}"
-    local_folder = f"file:{CONTENT_DIR}/{stage_name}"
+
+def read_device_attribute_ids(iot_topic):
+    # infer the unique data points in the CSV.
+    # The values may be known in advance and can be hard coded
+    id_column = CSV_SCHEMA.id_column
+    data = pd.read_csv(f"{CONTENT_DIR}/{iot_topic}_iot_data.csv", usecols=[id_column], dtype={id_column: str})
+    return sorted(data[id_column].unique())
+
+
+class IotDevice:
+    # the usd side of a device, devices that are discovered on the mqtt namespace
+    # get their prim and write plan on the next flush
+    def __init__(self, name, write_plan=None, payload_ids=None):
+        attribute_ids = write_plan.attribute_ids if write_plan else []
+        self.name = name
+        self.write_plan = write_plan
+        self.schema = AttributeSchemaCache(write_plan.layer, write_plan.prim_path) if write_plan else None
+        # only the numeric values are compared against their deadband
+        numeric_ids = [id for id in attribute_ids if self.schema.is_numeric(id)]
+        self.change_filter = ChangeFilter(DEADBAND_ABSOLUTE, DEADBAND_RELATIVE, DEADBANDS, numeric_ids)
+        if write_plan is not None:
+            # a reloaded live layer has lost the values that would be suppressed as unchanged
+            write_plan.content_replaced_callbacks.append(self.change_filter.reset)
+        # the binary payloads index the attributes of the device, or payload_ids, the _ts attribute first
+        self.codecs = make_payload_codecs(["_ts", *(attribute_ids if payload_ids is None else payload_ids)])
+        self.publish_topic = payload_topic(f"iot/{name}", PAYLOAD_FORMAT)
+
+    def prepare(self, live_layer, items):
+        # create the prim and the attributes that have not been written before,
+        # returns the values converted to the types of their attributes
+        if self.write_plan is None:
+            print(f"Creating the prim of the discovered device {self.name}")
+            initialize_device_prim(live_layer, self.name)
+            self.write_plan = AttributeWritePlan(live_layer, f"/iot/{self.name}", [])
+            self.write_plan.content_replaced_callbacks.append(self.change_filter.reset)
+            self.schema = AttributeSchemaCache(live_layer, f"/iot/{self.name}")
+        items, new_ids = self.schema.apply(items)
+        if new_ids:
+            self.write_plan.add(new_ids)
+            # only the numeric values are compared against their deadband
+            self.change_filter.add([id for id in new_ids if self.schema.is_numeric(id)])
+        return items
+
+
+def create_device(name):
+    # called once for every device of the mqtt namespace that was not initialized at startup
+    if not Sdf.Path.IsValidIdentifier(name):
+        print(f"Ignoring the topics of the device `{name}`, it is not a valid prim name")
+        return None
+    # the binary payloads of a device index the ids of its CSV export, e.g. a content device that is not
+    # in IOT_DEVICES, the binary payloads of other devices can't be decoded
+    csv_exists = CONTENT_DIR.joinpath(f"{name}_iot_data.csv").exists()
+    return IotDevice(name, payload_ids=read_device_attribute_ids(name) if csv_exists else [])
+
+
+async def initialize_async(iot_topics):
+    # upload the changed files of the Conveyor Belt to the target nucleus server
+    stage_name = STAGE_NAME
+    local_folder = CONTENT_DIR.joinpath(stage_name)
     stage_folder = f"{BASE_FOLDER}/{stage_name}"
     stage_url = f"{stage_folder}/{stage_name}.usd"
-    result = await omni.client.copy_async(
-        local_folder,
-        stage_folder,
-        behavior=omni.client.CopyBehavior.ERROR_IF_EXISTS,
-        message="Copy Conveyor Belt",
+    content_sync = ContentSync(local_folder, stage_folder, SYNC_WORKERS, "Copy Conveyor Belt", STORAGE)
+    print(f"Content sync: {await content_sync.run()}")
+    if content_sync.kept_paths:
+        print(f"Kept the files changed on the server: {', '.join(content_sync.kept_paths)}")
+
+    # open the stage while the live session is set up
+    live_session = LiveEditSession(stage_url, STORAGE)
+    stage, live_layer = await asyncio.gather(
+        asyncio.get_running_loop().run_in_executor(None, Usd.Stage.Open, stage_url),
+        live_session.ensure_exists(),
     )
-
-    stage = Usd.Stage.Open(stage_url)
     if not stage:
         raise Exception(f"Could load the stage {stage_url}.")
 
-    live_session = LiveEditSession(stage_url)
-    live_layer = await live_session.ensure_exists()
-
     session_layer = stage.GetSessionLayer()
     session_layer.subLayerPaths.append(live_layer.identifier)
 
     # set the live layer as the edit target
     stage.SetEditTarget(live_layer)
-    initialize_device_prim(live_layer, iot_topic)
+    with Sdf.ChangeBlock():
+        for iot_topic in iot_topics:
+            initialize_device_prim(live_layer, iot_topic)
+            initialize_device_attributes(live_layer, iot_topic, read_device_attribute_ids(iot_topic))
 
     # place the cube on the conveyor
     live_cube = LiveCube(stage)
     live_cube.scale(Gf.Vec3f(0.5))
     live_cube.translate(Gf.Vec3f(100.0, -30.0, 195.0))
 
-    omni.client.live_process()
+    STORAGE.live_process()
     return stage, live_layer
 
 
-def write_to_live(live_layer, iot_topic, msg_content):
-    # write the iot values to the usd prim attributes
-    payload = json.loads(msg_content)
-    with Sdf.ChangeBlock():
-        for i, (id, value) in enumerate(payload.items()):
-            attr = live_layer.GetAttributeAtPath(f"/iot/{iot_topic}.{id}")
-            if not attr:
-                raise Exception(f"Could not find attribute /iot/{iot_topic}.{id}.")
-            attr.default = value
-    omni.client.live_process()
-
+def write_to_live(writer, live_layer, devices, pending, mapper=None):
+    # merge the changed iot values that arrived for the devices since the last frame,
+    # they are written to the usd prim attributes by the next flush
+    for name, values in pending.items():
+        device = devices[name]
+        items = device.prepare(live_layer, values.items())
+        writer.update(device.write_plan, device.change_filter.filter_items(items))
+        if mapper is not None:
+            mapper.update_items(name, items)
+    if mapper is not None:
+        mapper.apply(writer)
 
-# publish to mqtt broker
-def write_to_mqtt(mqtt_client, iot_topic, group, ts):
-    # write the iot values to the usd prim attributes
-    topic = f"iot/{iot_topic}"
-    print(group.iloc[0]["TimeStamp"])
-    payload = {"_ts": ts}
-    for index, row in group.iterrows():
-        payload[row["Id"]] = row["Value"]
-    mqtt_client.publish(topic, json.dumps(payload, indent=2).encode("utf-8"))
 
+async def flush_to_live(queue, writer, live_layer, devices, replay_done, checkpoint=None, mapper=None):
+    # flush the updates once per frame until the replay is done and nothing is pending,
+    # the prims are only edited and checkpointed here so they never change while a flush is in progress
+    while not replay_done.is_set() or queue.depth:
+        await asyncio.sleep(writer.frame_budget)
+        write_to_live(writer, live_layer, devices, queue.drain(), mapper)
+        await writer.flush_async()
+        if checkpoint is not None:
+            checkpoint.checkpoint_if_due()
 
-# connect to mqtt broker
-def connect_mqtt(iot_topic):
-    topic = f"iot/{iot_topic}"
-
-    # called when a message arrives
-    def on_message(client, userdata, msg):
-        msg_content = msg.payload.decode()
-        write_to_live(live_layer, iot_topic, msg_content)
-        print(f"Received `{msg_content}` from `{msg.topic}` topic")
-
-    # called when connection to mqtt broker has been established
-    def on_connect(client, userdata, flags, rc):
-        if rc == 0:
-            # connect to our topic
-            print(f"Subscribing to topic: {topic}")
-            client.subscribe(topic)
-        else:
-            print(f"Failed to connect, return code {rc}")
-
-    # let us know when we've subscribed
-    def on_subscribe(client, userdata, mid, granted_qos):
-        print(f"subscribed {mid} {granted_qos}")
 
+# publish to mqtt broker
+def write_to_mqtt(transport, devices, ticks, timestamp, ts):
+    # write the iot values of all the devices in a single tick to their mqtt topics
+    print(timestamp)
+    for tick in ticks:
+        device = devices[tick.topic]
+        columns, values = PlaybackMatrix.present(tick.values)
+        items = [("_ts", ts)]
+        items.extend((tick.attribute_ids[column], value) for column, value in zip(columns, values))
+        transport.publish(device.publish_topic, device.codecs[PAYLOAD_FORMAT].encode(items), MQTT_QOS)
+
+
+def create_transport():
+    if MQTT_BROKER == "loopback":
+        # the publisher and the subscriber share the transport of the in-process broker
+        return LoopbackBroker().transport()
+    host, _, port = MQTT_BROKER.partition(":")
     # Set Connecting Client ID
-    client = mqtt_client.Client(f"python-mqtt-{random.randint(0, 1000)}")
-
-    client.on_connect = on_connect
-    client.on_message = on_message
-    client.on_subscribe = on_subscribe
-    client.connect("test.mosquitto.org", 1883)
-    client.loop_start()
-    return client
+    return PahoTransport(host, int(port or 1883), f"python-mqtt-{random.randint(0, 1000)}")
 
 
-def run(stage, live_layer, iot_topic):
-    # we assume that the file contains the data for single device
-    IOT_TOPIC_DATA = f"{CONTENT_DIR}/{iot_topic}_iot_data.csv"
-    data = pd.read_csv(IOT_TOPIC_DATA)
-    data.head()
-
-    # Converting to DateTime Format and drop ms
-    data["TimeStamp"] = pd.to_datetime(data["TimeStamp"])
-    data["TimeStamp"] = data["TimeStamp"].dt.floor("s")
-
-    data.set_index("TimeStamp")
-    start_time = data.min()["TimeStamp"]
-    last_time = start_time
-    grouped = data.groupby("TimeStamp")
-
-    mqtt_client = connect_mqtt(iot_topic)
-
-    # play back the data in real-time
-    for next_time, group in grouped:
-        diff = (next_time - last_time).total_seconds()
-        if diff > 0:
-            time.sleep(diff)
-            write_to_mqtt(mqtt_client, iot_topic, group, (next_time - start_time).total_seconds())
-        last_time = next_time
+# connect to mqtt broker
+async def connect_mqtt(queue, router, drained):
+    # called on the event loop when a message arrives, the values are merged until the next flush
+    def on_message(msg):
+        if msg.topic == DRAIN_TOPIC:
+            drained.set()
+            return
+        device, format = router.route(msg.topic)
+        if device is None:
+            return
+        try:
+            items = list(device.codecs[format].decode(msg.payload))
+        except Exception:
+            # other publishers on the namespace may send payloads of any shape
+            print(f"Failed to decode the payload from `{msg.topic}` topic")
+            return
+        queue.put(device.name, items)
+        print(f"Received `{dict(items)}` from `{msg.topic}` topic")
+
+    transport = create_transport()
+    transport.on_message = on_message
+    await transport.connect()
+    # connect to our topics, iot/<device>/# also matches the plain iot/<device> topic
+    subscriptions = SUBSCRIPTIONS or [f"iot/{name}/#" for name in router.devices]
+    print(f"Subscribing to topics: {', '.join(subscriptions)}")
+    transport.subscribe(subscriptions + [DRAIN_TOPIC], MQTT_QOS)
+    return transport
+
+
+async def drain_mqtt(transport, drained):
+    # wait until the messages published during the replay have been received, they may still be in flight
+    # on a network broker when the replay finishes
+    transport.publish(DRAIN_TOPIC, b"", MQTT_QOS)
+    try:
+        await asyncio.wait_for(drained.wait(), DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        print(f"The messages of the last ticks were not received within {DRAIN_TIMEOUT} s")
+
+
+def print_suppression(change_filters):
+    offered = sum(change_filter.offered for change_filter in change_filters.values())
+    written = sum(change_filter.written for change_filter in change_filters.values())
+    ratio = 1.0 - written / offered if offered else 0.0
+    print(f"Values offered: {offered}, written: {written}, suppressed: {ratio:.1%}")
+
+
+async def run_async(stage, live_layer, iot_topics):
+    # route the topics of the mqtt namespace to the devices, unknown devices are created once
+    router = TopicRouter(create_device)
+    # show the checkpointed values right away, they are only written again once they changed
+    checkpoint = None
+    restored = {}
+    if CHECKPOINT:
+        checkpoint = IotCheckpoint(live_layer, CHECKPOINT_URL, CHECKPOINT_INTERVAL)
+        restored = checkpoint.restore()
+        STORAGE.live_process()
+        print(f"Restored {checkpoint.stats.restored} values of {len(restored)} devices from {checkpoint.url}")
+    # every file contains the data for a single device
+    readers = {}
+    for iot_topic in iot_topics:
+        readers[iot_topic] = IotCsvReader(f"{CONTENT_DIR}/{iot_topic}_iot_data.csv", CSV_SCHEMA, cache=CSV_CACHE)
+        # resolve the attributes created by initialize_device_attributes and the checkpoint once
+        device = IotDevice(iot_topic, AttributeWritePlan(live_layer, f"/iot/{iot_topic}"))
+        device.change_filter.seed(restored.get(iot_topic, ()))
+        router.add(iot_topic, device)
+
+    mapper = None
+    if MAPPINGS_FILE:
+        mapper = TransformMapper(stage, load_transform_mappings(MAPPINGS_FILE))
+        STORAGE.live_process()
+
+    clock = ReplayClock(REPLAY_SPEED, REPLAY_MAX_RATE)
+    start_time = None
+
+    queue = LatestValueQueue(QUEUE_CAPACITY)
+    writer = CoalescingWriter(FRAME_BUDGET, STORAGE.live_process)
+    drained = asyncio.Event()
+    transport = await connect_mqtt(queue, router, drained)
+    replay_done = asyncio.Event()
+    flush_task = asyncio.create_task(
+        flush_to_live(queue, writer, live_layer, router.devices, replay_done, checkpoint, mapper)
+    )
 
-    mqtt_client = None
+    # play back the data of all the devices on a single timeline, the files are streamed on the executor
+    # and the mqtt messages are received and flushed while the replay waits for the next tick
+    async for next_time, ticks in merge_device_ticks_async(readers):
+        if start_time is None:
+            start_time = next_time
+            clock.start()
+
+        ts = (next_time - start_time).total_seconds()
+        await clock.wait_async(ts)
+        write_to_mqtt(transport, router.devices, ticks, next_time, ts)
+
+    await drain_mqtt(transport, drained)
+    replay_done.set()
+    await flush_task
+    await transport.disconnect()
+    if checkpoint is not None:
+        checkpoint.close()
+        print(f"Checkpoints - {checkpoint.stats}")
+    for device in router.devices.values():
+        if device.write_plan is not None:
+            device.write_plan.revoke()
+    if mapper is not None:
+        mapper.revoke()
+        print(f"Transform mappings - {mapper.stats}")
+    print(f"Replay finished - {clock.stats}")
+    print(f"Live writes - {writer.stats}")
+    print(f"Storage {STORAGE.name} - {STORAGE.stats}")
+    print(f"Writer queue - depth: {queue.depth}, {queue.stats}")
+    rejected = sum(device.schema.rejected for device in router.devices.values() if device.schema is not None)
+    print(f"Devices: {len(router.devices)}, ignored messages: {router.ignored}, rejected values: {rejected}")
+    if MQTT_BROKER == "loopback":
+        print(f"Loopback broker - {transport.broker.stats}")
+    print_suppression({name: device.change_filter for name, device in router.devices.items()})
+
+
+async def main_async(iot_topics):
+    # initialization, the mqtt client and the replay share a single event loop
+    stage, live_layer = await initialize_async(iot_topics)
+    await run_async(stage, live_layer, iot_topics)
 
 
 if __name__ == "__main__":
-    IOT_TOPIC = "A08_PR_NVD_01"
+    IOT_TOPICS = IOT_DEVICES.split(",") if IOT_DEVICES else discover_device_topics(CONTENT_DIR)
+    log_capture = LogCapture(LOG_CAPACITY, LOG_LEVEL, LOG_RATE_LIMIT, LOG_FILE)
     omni.client.initialize()
-    omni.client.set_log_level(omni.client.LogLevel.DEBUG)
-    omni.client.set_log_callback(log_handler)
+    log_capture.install()
     try:
-        stage, live_layer = asyncio.run(initialize_async(IOT_TOPIC))
-        run(stage, live_layer, IOT_TOPIC)
+        asyncio.run(main_async(IOT_TOPICS))
     except:
-        print("---- LOG MESSAGES ---")
-        print(*messages, sep="\n")
-        print("----")
+        log_capture.dump()
     finally:
+        log_capture.close()
         omni.client.shutdown()
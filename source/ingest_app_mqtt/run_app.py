@@ -29,6 +29,14 @@ parser.add_argument("--username", "-u", default=default_username)
 parser.add_argument("--password", "-p", default=default_password)
 parser.add_argument("--config", "-c", choices=["debug", "release"], default="release")
 parser.add_argument("--platform", default=CURRENT_PLATFORM)
+parser.add_argument("--speed", type=float, help="replay speed multiplier, e.g. 10 for 10x")
+parser.add_argument("--max-rate", action="store_true", help="replay as fast as possible")
+parser.add_argument("--devices", help="comma separated list of devices, defaults to all the content csv files")
+parser.add_argument("--broker", help='mqtt broker host[:port], "loopback" for the in-process broker')
+parser.add_argument("--payload-format", choices=["json", "msgpack", "bin"], help="payload format of the mqtt messages")
+parser.add_argument("--storage", help='"local[:folder]" keeps the stage and the live session in a local folder')
+parser.add_argument("--subscriptions", help='comma separated mqtt topic filters, e.g. "iot/#" to discover devices')
+parser.add_argument("--mappings", help="JSON file of rules that drive the transforms of prims with iot values")
 args = parser.parse_args()
 
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
@@ -63,6 +71,22 @@ os.environ["PYTHONPATH"] = os.pathsep + os.pathsep.join(EXTRA_PYTHON_PATHS)
 os.environ["OMNI_USER"] = args.username
 os.environ["OMNI_PASS"] = args.password
 os.environ["OMNI_HOST"] = args.server
+if args.storage:
+    os.environ["IOT_STORAGE"] = args.storage
+if args.mappings:
+    os.environ["IOT_MAPPINGS"] = os.path.abspath(args.mappings)
+if args.speed is not None:
+    os.environ["IOT_REPLAY_SPEED"] = str(args.speed)
+if args.max_rate:
+    os.environ["IOT_REPLAY_MAX_RATE"] = "1"
+if args.devices:
+    os.environ["IOT_DEVICES"] = args.devices
+if args.broker:
+    os.environ["IOT_MQTT_BROKER"] = args.broker
+if args.payload_format:
+    os.environ["IOT_PAYLOAD_FORMAT"] = args.payload_format
+if args.subscriptions:
+    os.environ["IOT_SUBSCRIPTIONS"] = args.subscriptions
 
 if PLATFORM_SYSTEM == "windows":
     PYTHON_EXE = DEPS_DIR.joinpath("python", "python")
@@ -1,7 +1,50 @@
 import jwt
 from .live_edit_session import LiveEditSession
 from .nucleus_client_error import NucleusClientError
-from .live_cube import LiveCube
+from .storage_backend import LocalStorage, NucleusStorage, StorageStats, create_storage
+from .live_cube import CubeFactory, LiveCube
+from .cube_animator import CubeAnimator, euler_xyz_to_quaternions
+from .iot_csv_reader import IotCsvReader, IotCsvSchema, IotCsvBlock
+from .playback_matrix import PlaybackMatrix
+from .playback_cache import PlaybackCache, PlaybackCacheWriter
+from .attribute_write_plan import AttributeWritePlan
+from .attribute_schema import AttributeSchemaCache, infer_value_type
+from .change_filter import ChangeFilter, parse_deadbands
+from .coalescing_writer import CoalescingWriter, CoalescingStats
+from .content_sync import ContentSync, ContentSyncStats
+from .iot_checkpoint import IotCheckpoint, IotCheckpointStats
+from .latest_value_queue import LatestValueQueue, LatestValueQueueStats
+from .log_capture import LogCapture, LogCaptureStats, parse_log_level
+from .replay_clock import ReplayClock, ReplayStats
+from .frame_scheduler import FrameScheduler, FrameStats, FrameTimeHistogram
+from .transform_mapper import (
+    TransformMapper,
+    TransformMapperStats,
+    TransformMapping,
+    load_transform_mappings,
+    parse_transform_mappings,
+)
+from .time_sample_backfill import TimeSampleBackfill
+from .async_mqtt_loop import AsyncMqttLoop
+from .mqtt_transport import (
+    LoopbackBroker,
+    LoopbackBrokerStats,
+    LoopbackTransport,
+    MqttMessage,
+    PahoTransport,
+    topic_matches,
+)
+from .payload_codec import (
+    BinaryCodec,
+    JsonCodec,
+    MsgpackCodec,
+    make_payload_codecs,
+    parse_payload_topic,
+    payload_topic,
+)
+from .topic_router import TopicRouter
+from .sharding import ShardMetrics, ShardSupervisor, partition_devices
+from .iot_devices import IotDeviceTick, discover_device_topics, merge_device_ticks, merge_device_ticks_async
 
 def getUserNameFromToken(token: str):
     unvalidated = jwt.decode(token, options={"verify_signature": False})
@@ -0,0 +1,65 @@
+import asyncio
+
+# paho.mqtt.client.MQTT_ERR_SUCCESS, the client is only used through its callbacks and loop_* methods
+MQTT_ERR_SUCCESS = 0
+
+
+class AsyncMqttLoop:
+    """
+    Drives the network IO of a paho MQTT client from an asyncio event loop instead of the loop_start()
+    thread, so that the MQTT callbacks run on the same loop as the omni.client async calls.
+
+    The socket of the client is watched with add_reader/add_writer, keep alives and retries run in a
+    task once per second. Must be created after the callbacks of the client are set and before it
+    connects. connected resolves with the return code of the CONNACK and disconnected when the socket
+    is closed.
+    """
+
+    def __init__(self, client, loop=None):
+        self.client = client
+        self.loop = loop or asyncio.get_running_loop()
+        self.connected = self.loop.create_future()
+        self.disconnected = self.loop.create_future()
+        self._misc = None
+        self._on_connect = client.on_connect
+
+        client.on_connect = self.on_connect
+        client.on_socket_open = self.on_socket_open
+        client.on_socket_close = self.on_socket_close
+        client.on_socket_register_write = self.on_socket_register_write
+        client.on_socket_unregister_write = self.on_socket_unregister_write
+
+    async def disconnect(self):
+        self.client.disconnect()
+        await self.disconnected
+
+    def on_connect(self, client, userdata, flags, rc):
+        if self._on_connect is not None:
+            self._on_connect(client, userdata, flags, rc)
+        if not self.connected.done():
+            self.connected.set_result(rc)
+
+    def on_socket_open(self, client, userdata, sock):
+        self.loop.add_reader(sock, client.loop_read)
+        self._misc = self.loop.create_task(self._misc_loop())
+
+    def on_socket_close(self, client, userdata, sock):
+        self.loop.remove_reader(sock)
+        if self._misc is not None:
+            self._misc.cancel()
+            self._misc = None
+        if not self.disconnected.done():
+            self.disconnected.set_result(None)
+
+    def on_socket_register_write(self, client, userdata, sock):
+        self.loop.add_writer(sock, client.loop_write)
+
+    def on_socket_unregister_write(self, client, userdata, sock):
+        self.loop.remove_writer(sock)
+
+    async def _misc_loop(self):
+        while self.client.loop_misc() == MQTT_ERR_SUCCESS:
+            try:
+                await asyncio.sleep(1.0)
+            except asyncio.CancelledError:
+                break
@@ -0,0 +1,129 @@
+from pxr import Gf, Sdf
+
+
+def _to_double(value):
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def _to_int(value):
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return None
+
+
+def _to_bool(value):
+    return value if isinstance(value, bool) else None
+
+
+def _to_string(value):
+    return value if isinstance(value, str) else None
+
+
+def _to_float3(value):
+    if isinstance(value, (list, tuple)) and len(value) == 3 and all(isinstance(c, (int, float)) for c in value):
+        return Gf.Vec3f(*value)
+    return None
+
+
+def _keep(value):
+    return value
+
+
+# value type name -> (Sdf value type, converter returning the value for the attribute or None)
+VALUE_TYPES = {
+    "double": (Sdf.ValueTypeNames.Double, _to_double),
+    "int64": (Sdf.ValueTypeNames.Int64, _to_int),
+    "bool": (Sdf.ValueTypeNames.Bool, _to_bool),
+    "string": (Sdf.ValueTypeNames.String, _to_string),
+    "float3": (Sdf.ValueTypeNames.Float3, _to_float3),
+}
+
+NUMERIC_VALUE_TYPES = ("double", "int64")
+
+
+def infer_value_type(value):
+    """
+    returns the value type name of a payload value, or None if it can't be written to an attribute,
+    integers are inferred as double since a reading of 20 is usually followed by 20.5
+    """
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "double"
+    if isinstance(value, str):
+        return "string"
+    if _to_float3(value) is not None:
+        return "float3"
+    return None
+
+
+class AttributeSchemaCache:
+    """
+    Keeps the value type of every attribute of an IoT prim, so that payloads with keys that have
+    not been seen before can be written.
+
+    The type of a new key is inferred from its first value (double for numbers, bool, string or float3
+    for a list of three numbers) and the missing attribute specs of a payload are created in a single
+    change block. After that a key is a dictionary lookup and a conversion to the type of its attribute.
+    int64 attributes are only used when they already exist in the layer. Values that can't be converted
+    and keys that are not valid attribute names are rejected and counted, a key stays untyped until a
+    value whose type can be inferred arrives.
+    """
+
+    def __init__(self, layer: Sdf.Layer, prim_path):
+        self.layer = layer
+        self.prim_path = Sdf.Path(prim_path)
+        self.value_types = {}
+        self.rejected = 0
+        self._converters = {}
+        prim_spec = layer.GetPrimAtPath(self.prim_path)
+        for attr in prim_spec.attributes:
+            value_type = str(attr.typeName)
+            self.value_types[attr.name] = value_type
+            self._converters[attr.name] = VALUE_TYPES[value_type][1] if value_type in VALUE_TYPES else _keep
+
+    def is_numeric(self, id):
+        return self.value_types.get(id) in NUMERIC_VALUE_TYPES
+
+    def apply(self, items):
+        """
+        converts (attribute id, value) pairs to the types of their attributes, creating the missing
+        attributes, returns the converted pairs and the ids of the created attributes
+        """
+        converters = self._converters
+        converted = []
+        new_types = {}
+        for id, value in items:
+            convert = converters.get(id)
+            if convert is None:
+                convert = self._add(id, value, new_types)
+                if convert is None:
+                    self.rejected += 1
+                    continue
+                converters[id] = convert
+            value = convert(value)
+            if value is None:
+                self.rejected += 1
+            else:
+                converted.append((id, value))
+        if new_types:
+            self._create(new_types)
+        return converted, list(new_types)
+
+    def _add(self, id, value, new_types):
+        value_type = infer_value_type(value)
+        if value_type is None or not Sdf.Path.IsValidIdentifier(id):
+            return None
+        new_types[id] = value_type
+        self.value_types[id] = value_type
+        return VALUE_TYPES[value_type][1]
+
+    def _create(self, new_types):
+        prim_spec = self.layer.GetPrimAtPath(self.prim_path)
+        with Sdf.ChangeBlock():
+            for id, value_type in new_types.items():
+                attr = Sdf.AttributeSpec(prim_spec, id, VALUE_TYPES[value_type][0])
+                if not attr:
+                    raise Exception(f"Could not define the attribute: {id}")
@@ -0,0 +1,116 @@
+from pxr import Sdf, Tf
+
+TIMESTAMP_ATTRIBUTE = "_ts"
+
+
+class AttributeWritePlan:
+    """
+    Resolves the attribute specs of an IoT prim once so that values can be written
+    without building paths or looking them up in the layer.
+
+    The columns used by write() are the positions in attribute_ids. The plan invalidates itself
+    when the content of the layer is reloaded or replaced, a spec that has been removed is detected
+    when it is written to. In both cases the specs are resolved again on the next write. The callables
+    in content_replaced_callbacks are called after a reload, e.g. ChangeFilter.reset, so that the values
+    that were suppressed as unchanged are written to the new content.
+
+    The _ts attribute is only required to write a timestamp, so a plan can also write to the
+    attributes of prims that are not IoT prims, e.g. the xform ops of the TransformMapper prims.
+    """
+
+    def __init__(self, layer: Sdf.Layer, prim_path, attribute_ids=None):
+        self.layer = layer
+        self.prim_path = Sdf.Path(prim_path)
+        if attribute_ids is None:
+            prim_spec = layer.GetPrimAtPath(self.prim_path)
+            attribute_ids = [attr.name for attr in prim_spec.attributes if attr.name != TIMESTAMP_ATTRIBUTE]
+        self.attribute_ids = list(attribute_ids)
+        self._specs = None
+        self._specs_by_id = None
+        self._ts_spec = None
+        self.content_replaced_callbacks = []
+        self._listener = Tf.Notice.Register(Sdf.Notice.LayerDidReplaceContent, self._on_content_replaced, layer)
+
+    @property
+    def is_valid(self):
+        return self._specs is not None
+
+    def compile(self):
+        """resolve the attribute specs"""
+        self._ts_spec = self.layer.GetAttributeAtPath(self.prim_path.AppendProperty(TIMESTAMP_ATTRIBUTE)) or None
+        self._specs = [self._resolve(id) for id in self.attribute_ids]
+        self._specs_by_id = dict(zip(self.attribute_ids, self._specs))
+        if self._ts_spec is not None:
+            self._specs_by_id[TIMESTAMP_ATTRIBUTE] = self._ts_spec
+
+    def invalidate(self):
+        self._specs = None
+        self._specs_by_id = None
+        self._ts_spec = None
+
+    def add(self, attribute_ids):
+        """append attributes to the plan, the specs must already exist in the layer"""
+        self.attribute_ids.extend(attribute_ids)
+        if self.is_valid:
+            for id in attribute_ids:
+                spec = self._resolve(id)
+                self._specs.append(spec)
+                self._specs_by_id[id] = spec
+
+    def write(self, columns, values, ts=None):
+        """write values to the attributes at the column positions in a single change block"""
+        if not self.is_valid:
+            self.compile()
+        try:
+            self._write(columns, values, ts)
+        except RuntimeError:
+            # a spec has expired, resolve the specs again and retry once
+            self.compile()
+            self._write(columns, values, ts)
+
+    def write_items(self, items):
+        """write (attribute id, value) pairs in a single change block"""
+        if not self.is_valid:
+            self.compile()
+        items = list(items)
+        try:
+            self._write_items(items)
+        except RuntimeError:
+            self.compile()
+            self._write_items(items)
+
+    def revoke(self):
+        """stop listening to layer notices"""
+        if self._listener:
+            self._listener.Revoke()
+            self._listener = None
+
+    def _write(self, columns, values, ts):
+        specs = self._specs
+        with Sdf.ChangeBlock():
+            if ts is not None:
+                if self._ts_spec is None:
+                    raise Exception(f"Could not find attribute {self.prim_path}.{TIMESTAMP_ATTRIBUTE}.")
+                self._ts_spec.default = ts
+            for column, value in zip(columns, values):
+                specs[column].default = value
+
+    def _write_items(self, items):
+        specs_by_id = self._specs_by_id
+        with Sdf.ChangeBlock():
+            for id, value in items:
+                spec = specs_by_id.get(id)
+                if spec is None:
+                    raise Exception(f"Could not find attribute {self.prim_path}.{id}.")
+                spec.default = value
+
+    def _resolve(self, id):
+        attr = self.layer.GetAttributeAtPath(self.prim_path.AppendProperty(id))
+        if not attr:
+            raise Exception(f"Could not find attribute {self.prim_path}.{id}.")
+        return attr
+
+    def _on_content_replaced(self, notice, sender):
+        self.invalidate()
+        for callback in self.content_replaced_callbacks:
+            callback()
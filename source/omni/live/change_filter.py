@@ -0,0 +1,113 @@
+import numpy as np
+
+
+def parse_deadbands(text):
+    """
+    parses per attribute deadbands from "id=absolute[:relative],..."
+    e.g. "Velocity=0.1,System_Voltage=0.5:0.01"
+    """
+    deadbands = {}
+    for entry in filter(None, (entry.strip() for entry in (text or "").split(","))):
+        id, _, bands = entry.partition("=")
+        absolute, _, relative = bands.partition(":")
+        deadbands[id.strip()] = (float(absolute or 0.0), float(relative or 0.0))
+    return deadbands
+
+
+class ChangeFilter:
+    """
+    Change detection in front of the USD writer, so that unchanged values are not sent as live deltas.
+
+    Keeps the last written value of every attribute and only passes the values that moved past the
+    deadband of the attribute, i.e. |value - last| > max(absolute, relative * |last|). With the default
+    deadband of 0 only values that are exactly the same are suppressed. The columns are the positions
+    in attribute_ids, like the columns of the AttributeWritePlan.
+    """
+
+    def __init__(self, absolute=0.0, relative=0.0, deadbands=None, attribute_ids=()):
+        self.absolute = absolute
+        self.relative = relative
+        self.deadbands = deadbands or {}
+        self.attribute_ids = []
+        self.offered = 0
+        self.written = 0
+        self._columns = {}
+        self._seeds = {}
+        self._last = np.empty(0)
+        self._absolute = np.empty(0)
+        self._relative = np.empty(0)
+        self.add(attribute_ids)
+
+    @property
+    def suppression_ratio(self):
+        return 1.0 - self.written / self.offered if self.offered else 0.0
+
+    def add(self, attribute_ids):
+        """append attributes, they always pass the first time they are seen unless they were seeded"""
+        if not attribute_ids:
+            return
+        bands = [self.deadbands.get(id, (self.absolute, self.relative)) for id in attribute_ids]
+        self._columns.update((id, len(self.attribute_ids) + i) for i, id in enumerate(attribute_ids))
+        self.attribute_ids.extend(attribute_ids)
+        self._last = np.concatenate([self._last, [self._seeds.pop(id, np.nan) for id in attribute_ids]])
+        self._absolute = np.concatenate([self._absolute, [band[0] for band in bands]])
+        self._relative = np.concatenate([self._relative, [band[1] for band in bands]])
+
+    def seed(self, items):
+        """
+        set the last written values, e.g. restored from a checkpoint, of (attribute id, value) pairs,
+        the values of attributes that have not been added yet are used when they are added
+        """
+        for id, value in items:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            column = self._columns.get(id)
+            if column is None:
+                self._seeds[id] = float(value)
+            else:
+                self._last[column] = value
+
+    def reset(self):
+        """
+        forget the last written values, called by the AttributeWritePlan of the attributes when the
+        content of the live layer has been reloaded or replaced
+        """
+        self._last[:] = np.nan
+
+    def filter(self, values):
+        """
+        takes the values of a tick by column, NaN for no reading, and returns the columns and
+        values to write
+        """
+        columns = self._changed(np.arange(len(values)), values)
+        return columns.tolist(), values[columns].tolist()
+
+    def filter_items(self, items):
+        """takes (attribute id, value) pairs and returns the pairs to write, unknown ids always pass"""
+        passed = []
+        ids = []
+        columns = []
+        values = []
+        for id, value in items:
+            column = self._columns.get(id)
+            if column is None:
+                passed.append((id, value))
+            else:
+                ids.append(id)
+                columns.append(column)
+                values.append(value)
+        if columns:
+            changed = self._changed(np.array(columns), np.array(values, dtype=np.float64))
+            passed.extend((ids[i], values[i]) for i in changed.tolist())
+        return passed
+
+    def _changed(self, columns, values):
+        last = self._last[columns]
+        band = np.maximum(self._absolute[columns], self._relative[columns] * np.abs(last))
+        present = ~np.isnan(values)
+        # NaN compares as False, so attributes without a last value always pass
+        changed = np.flatnonzero(present & ~(np.abs(values - last) <= band))
+        self._last[columns[changed]] = values[changed]
+        self.offered += int(np.count_nonzero(present))
+        self.written += len(changed)
+        return changed
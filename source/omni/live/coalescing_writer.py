@@ -0,0 +1,173 @@
+import asyncio
+import threading
+import time
+
+import omni.client
+from pxr import Sdf
+
+
+class CoalescingStats:
+    def __init__(self):
+        self.flushes = 0
+        self.updates = 0
+        self.written = 0
+        self.total_flush_time = 0.0
+        self.max_flush_time = 0.0
+        self.total_delay = 0.0
+        self.max_delay = 0.0
+
+    @property
+    def merged(self):
+        """updates that were replaced by a later value of the same attribute before being flushed"""
+        return self.updates - self.written
+
+    @property
+    def updates_per_flush(self):
+        return self.updates / self.flushes if self.flushes else 0.0
+
+    def __str__(self):
+        flushes = max(self.flushes, 1)
+        return (
+            f"flushes: {self.flushes}, updates: {self.updates}, merged: {self.merged}, "
+            f"updates/flush: {self.updates_per_flush:.1f}, "
+            f"flush time mean: {self.total_flush_time / flushes * 1000.0:.2f} ms "
+            f"max: {self.max_flush_time * 1000.0:.2f} ms, "
+            f"delay mean: {self.total_delay / flushes * 1000.0:.2f} ms max: {self.max_delay * 1000.0:.2f} ms"
+        )
+
+
+class _PendingWrites:
+    # the latest values of a write plan, by column from update_columns() and by attribute id from update()
+    __slots__ = ("columns", "items", "ts")
+
+    def __init__(self):
+        self.columns = {}
+        self.items = {}
+        self.ts = None
+
+    def __len__(self):
+        return len(self.columns) + len(self.items) + (self.ts is not None)
+
+    def merge(self, newer):
+        self.columns.update(newer.columns)
+        self.items.update(newer.items)
+        if newer.ts is not None:
+            self.ts = newer.ts
+
+    def write(self, write_plan):
+        if self.columns or self.ts is not None:
+            write_plan.write(list(self.columns), list(self.columns.values()), self.ts)
+        if self.items:
+            write_plan.write_items(self.items.items())
+
+
+class CoalescingWriter:
+    """
+    Gathers attribute updates and writes them at most once per frame, followed by a single
+    omni.client.live_process() call, instead of flushing every update to Nucleus.
+
+    Only the latest value of an attribute is kept until the next flush. flush_if_due() flushes when
+    frame_budget seconds have passed since the last flush, so isolated updates are written right away
+    and bursts are merged. Updates and flushes may come from different threads. The updates of a flush
+    that fails are merged back and written by the next one.
+
+    The values merged by column with update_columns() are written with AttributeWritePlan.write(), by
+    the position of their specs, without building (attribute id, value) pairs or looking up the ids.
+    """
+
+    def __init__(self, frame_budget=0.033, live_process=omni.client.live_process):
+        self.frame_budget = frame_budget
+        self.stats = CoalescingStats()
+        self._live_process = live_process
+        self._pending = {}
+        self._oldest = None
+        self._last_flush = 0.0
+        # the pending updates are swapped under _lock, so updates are not blocked by a flush in progress
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    @property
+    def pending(self):
+        return sum(len(writes) for writes in self._pending.values())
+
+    def update(self, write_plan, items):
+        """merge (attribute id, value) pairs for the attributes of the write plan"""
+        with self._lock:
+            writes = self._pending.get(write_plan)
+            if writes is None:
+                writes = self._pending[write_plan] = _PendingWrites()
+            values = writes.items
+            for id, value in items:
+                values[id] = value
+                self.stats.updates += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+
+    def update_columns(self, write_plan, columns, values, ts=None):
+        """merge values for the attribute columns of the write plan, columns are positions in its attribute_ids"""
+        with self._lock:
+            writes = self._pending.get(write_plan)
+            if writes is None:
+                writes = self._pending[write_plan] = _PendingWrites()
+            writes.columns.update(zip(columns, values))
+            self.stats.updates += len(columns)
+            if ts is not None:
+                writes.ts = ts
+                self.stats.updates += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+
+    def time_until_due(self):
+        """seconds until flush_if_due() flushes the pending updates, 0.0 once they are due"""
+        return max(self._last_flush + self.frame_budget - time.monotonic(), 0.0)
+
+    def flush_if_due(self):
+        if self._pending and time.monotonic() - self._last_flush >= self.frame_budget:
+            return self.flush()
+        return False
+
+    async def flush_async(self):
+        """flush in the default executor, so that the event loop keeps running while Nucleus is slow"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending = self._pending
+                oldest = self._oldest
+                self._pending = {}
+                self._oldest = None
+            if not pending:
+                return False
+
+            start = time.monotonic()
+            try:
+                with Sdf.ChangeBlock():
+                    for write_plan, writes in pending.items():
+                        writes.write(write_plan)
+                self._live_process()
+            except BaseException:
+                self._restore(pending, oldest)
+                raise
+            end = time.monotonic()
+            self._last_flush = end
+
+            stats = self.stats
+            stats.flushes += 1
+            stats.written += sum(len(writes) for writes in pending.values())
+            stats.total_flush_time += end - start
+            stats.max_flush_time = max(stats.max_flush_time, end - start)
+            stats.total_delay += end - oldest
+            stats.max_delay = max(stats.max_delay, end - oldest)
+            return True
+
+    def _restore(self, pending, oldest):
+        """merge the updates of a failed flush back, the updates that arrived since then are newer"""
+        with self._lock:
+            for write_plan, writes in pending.items():
+                newer = self._pending.get(write_plan)
+                if newer is not None:
+                    writes.merge(newer)
+                self._pending[write_plan] = writes
+            if self._oldest is None or oldest < self._oldest:
+                self._oldest = oldest
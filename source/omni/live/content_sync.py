@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import omni.client
+
+from .nucleus_client_error import NucleusClientError
+from .storage_backend import NucleusStorage
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = ".content_sync.json"
+
+
+class ContentSyncStats:
+    def __init__(self):
+        self.files = 0
+        self.uploaded = 0
+        self.skipped = 0
+        self.kept = 0
+        self.failed = 0
+        self.bytes_uploaded = 0
+        self.hashed = 0
+        self.elapsed = 0.0
+
+    def __str__(self):
+        return (
+            f"files: {self.files}, uploaded: {self.uploaded} ({self.bytes_uploaded / 1e6:.1f} MB), "
+            f"unchanged: {self.skipped}, kept server changes: {self.kept}, failed: {self.failed}, "
+            f"hashed: {self.hashed}, "
+            f"elapsed: {self.elapsed:.2f} s"
+        )
+
+
+class ContentSync:
+    """
+    Uploads a local content folder to a Nucleus folder, skipping the files that are already up to date.
+
+    The remote folder keeps a manifest ({remote folder}/.content_sync.json) of the size, modification
+    time and SHA-256 of every local file that was synchronized. A file is uploaded when it is missing
+    from the remote listing, or when its hash differs from the manifest, i.e. it was changed locally.
+    Like the PlaybackCache, a file is only hashed when its size or modification time differ from the
+    manifest. A remote file that was not changed locally is never overwritten, e.g. a stage that was
+    edited on the server. Such files are listed in kept_paths when their remote size differs from the
+    local file. The changed files are uploaded concurrently by at most workers copies, the manifest is
+    written once they completed and lists only the files that were synchronized successfully.
+    """
+
+    def __init__(self, local_folder, remote_folder, workers=8, message="Sync content", storage=None):
+        self.local_folder = Path(local_folder)
+        self.remote_folder = remote_folder.rstrip("/")
+        self.manifest_url = f"{self.remote_folder}/{MANIFEST_NAME}"
+        self.workers = max(workers, 1)
+        self.message = message
+        self.storage = storage or NucleusStorage()
+        self.stats = ContentSyncStats()
+        self.kept_paths = []
+
+    async def run(self):
+        """uploads the changed files, raises NucleusClientError if any of them could not be uploaded"""
+        start = time.perf_counter()
+        stats = self.stats
+        local_files = self._list_local()
+        stats.files = len(local_files)
+        manifest, remote_sizes = await asyncio.gather(self._read_manifest(), self._list_remote(self.remote_folder))
+
+        loop = asyncio.get_running_loop()
+        entries = await asyncio.gather(
+            *(
+                loop.run_in_executor(None, self._local_entry, path, manifest.get(path))
+                for path in local_files
+            )
+        )
+
+        semaphore = asyncio.Semaphore(self.workers)
+        uploads = []
+        new_manifest = {}
+        for path, entry in zip(local_files, entries):
+            known = manifest.get(path)
+            remote_size = remote_sizes.get(path)
+            if remote_size is None:
+                uploads.append((path, entry, omni.client.CopyBehavior.ERROR_IF_EXISTS))
+            elif known is not None and known["sha256"] != entry["sha256"]:
+                uploads.append((path, entry, omni.client.CopyBehavior.OVERWRITE))
+            else:
+                # not changed locally, or not uploaded by a ContentSync, the remote file is not overwritten
+                if remote_size == entry["size"]:
+                    stats.skipped += 1
+                else:
+                    stats.kept += 1
+                    self.kept_paths.append(path)
+                new_manifest[path] = entry
+        results = await asyncio.gather(
+            *(self._upload(semaphore, path, behavior) for path, _entry, behavior in uploads)
+        )
+
+        failed = []
+        for (path, entry, _behavior), result in zip(uploads, results):
+            if result == omni.client.Result.OK:
+                stats.uploaded += 1
+                stats.bytes_uploaded += entry["size"]
+                new_manifest[path] = entry
+            else:
+                failed.append(f"{path}: {result}")
+        stats.failed = len(failed)
+
+        if new_manifest != manifest:
+            await self._write_manifest(new_manifest)
+        stats.elapsed = time.perf_counter() - start
+        if failed:
+            raise NucleusClientError(f"Error uploading to {self.remote_folder}: {', '.join(failed)}")
+        return stats
+
+    def _list_local(self):
+        """the paths of the local files relative to the local folder, with forward slashes"""
+        paths = []
+        for root, _dirs, files in os.walk(self.local_folder):
+            for name in files:
+                paths.append(Path(root, name).relative_to(self.local_folder).as_posix())
+        return sorted(paths)
+
+    def _local_entry(self, path, known):
+        stat = (self.local_folder / path).stat()
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if known and known["size"] == entry["size"] and known["mtime_ns"] == entry["mtime_ns"]:
+            entry["sha256"] = known["sha256"]
+        else:
+            entry["sha256"] = self._hash(self.local_folder / path)
+            self.stats.hashed += 1
+        return entry
+
+    @staticmethod
+    def _hash(file_path):
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    async def _list_remote(self, folder_url, prefix=""):
+        """remote path relative to the remote folder -> size of every file below folder_url"""
+        result, entries = await self.storage.list_async(folder_url)
+        if result == omni.client.Result.ERROR_NOT_FOUND:
+            return {}
+        if result != omni.client.Result.OK:
+            raise NucleusClientError(f"Error listing {folder_url}: {result}")
+
+        sizes = {}
+        folders = []
+        for entry in entries:
+            path = f"{prefix}{entry.relative_path}"
+            if entry.flags & omni.client.ItemFlags.CAN_HAVE_CHILDREN:
+                folders.append(path)
+            else:
+                sizes[path] = entry.size
+        for folder_sizes in await asyncio.gather(
+            *(self._list_remote(f"{self.remote_folder}/{folder}", f"{folder}/") for folder in folders)
+        ):
+            sizes.update(folder_sizes)
+        return sizes
+
+    async def _read_manifest(self):
+        result, _version, content = await self.storage.read_file_async(self.manifest_url)
+        if result != omni.client.Result.OK:
+            return {}
+        try:
+            manifest = json.loads(memoryview(content).tobytes())
+        except ValueError:
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest["files"]
+
+    async def _write_manifest(self, files):
+        content = json.dumps({"version": MANIFEST_VERSION, "files": files}, indent=1, sort_keys=True)
+        result = await self.storage.write_file_async(self.manifest_url, content.encode("utf-8"))
+        if result != omni.client.Result.OK:
+            raise NucleusClientError(f"Error writing the content manifest {self.manifest_url}: {result}")
+
+    async def _upload(self, semaphore, path, behavior):
+        async with semaphore:
+            return await self.storage.copy_async(
+                f"file:{self.local_folder / path}", f"{self.remote_folder}/{path}", behavior, self.message
+            )
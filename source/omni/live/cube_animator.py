@@ -0,0 +1,95 @@
+import math
+
+import numpy as np
+from pxr import Sdf, UsdGeom, Vt
+
+from .live_cube import CubeFactory
+
+
+def euler_xyz_to_quaternions(rotations):
+    """
+    quaternions (imaginary x, y, z, real w) of rotateXYZ euler angles in degrees, one row per rotation,
+    the rotation about X is applied first like the rotateXYZ xform op
+    """
+    half = np.radians(rotations) * 0.5
+    c = np.cos(half)
+    s = np.sin(half)
+    cx, cy, cz = c[:, 0], c[:, 1], c[:, 2]
+    sx, sy, sz = s[:, 0], s[:, 1], s[:, 2]
+    # qz * qy * qx
+    quaternions = np.empty((len(rotations), 4))
+    quaternions[:, 0] = cz * cy * sx - sz * sy * cx
+    quaternions[:, 1] = cz * sy * cx + sz * cy * sx
+    quaternions[:, 2] = sz * cy * cx - cz * sy * sx
+    quaternions[:, 3] = cz * cy * cx + sz * sy * sx
+    return quaternions
+
+
+class CubeAnimator:
+    """
+    Animates count cubes as the instances of a single UsdGeom.PointInstancer, instead of one prim with
+    its own xform ops per cube.
+
+    The positions, rotations (rotateXYZ euler angles in degrees) and scales of all the cubes are kept
+    in NumPy arrays. animate() advances the rotations of all the cubes with vectorized math, like
+    LiveCube.rotate() does for a single cube, and writes the positions, orientations and scales array
+    attributes of the instancer in one change block. The attribute specs of the edit target layer are
+    resolved once, so a frame is three array assignments regardless of the number of cubes. The instanced
+    cube is the mesh prototype of a CubeFactory, shared with the LiveCube cubes.
+    """
+
+    def __init__(self, stage, count, path="/World/cubes", spacing=150.0, seed=None, factory=None):
+        rng = np.random.default_rng(seed)
+        self.count = count
+        self.path = Sdf.Path(path)
+
+        # lay the cubes out on a square grid in the XZ plane, centered on the instancer
+        side = math.ceil(math.sqrt(count))
+        index = np.arange(count)
+        self.positions = np.zeros((count, 3), dtype=np.float32)
+        self.positions[:, 0] = (index % side - (side - 1) / 2.0) * spacing
+        self.positions[:, 2] = (index // side - (side - 1) / 2.0) * spacing
+        self.rotations = np.zeros((count, 3))
+        self.increments = rng.uniform(-1.0, 1.0, (count, 3)) * 10.0
+        self.scales = np.ones((count, 3), dtype=np.float32)
+
+        instancer = UsdGeom.PointInstancer.Define(stage, self.path)
+        # the prototype of the instancer is an instanceable reference to the cube mesh of the factory
+        prototype = (factory or CubeFactory(stage)).create(self.path.AppendPath("Prototypes/cube"))
+        instancer.CreatePrototypesRel().SetTargets([prototype.GetPath()])
+        instancer.CreateProtoIndicesAttr().Set(Vt.IntArray.FromNumpy(np.zeros(count, dtype=np.int32)))
+
+        # author the attributes in the edit target layer and write to their specs from then on
+        attributes = (
+            instancer.CreatePositionsAttr(Vt.Vec3fArray.FromNumpy(self.positions)),
+            instancer.CreateOrientationsAttr(Vt.QuathArray.FromNumpy(self.orientations())),
+            instancer.CreateScalesAttr(Vt.Vec3fArray.FromNumpy(self.scales)),
+        )
+        edit_target = stage.GetEditTarget()
+        self.layer = edit_target.GetLayer()
+        self._positions_spec, self._orientations_spec, self._scales_spec = (
+            self.layer.GetAttributeAtPath(edit_target.MapToSpecPath(attribute.GetPath())) for attribute in attributes
+        )
+
+    def step(self):
+        """advance the rotations by one frame, reversing the direction of the angles that pass 360 degrees"""
+        bounce = np.abs(self.rotations + self.increments) > 360.0
+        self.increments[bounce] *= -1.0
+        self.rotations += self.increments
+
+    def orientations(self):
+        return euler_xyz_to_quaternions(self.rotations).astype(np.float16)
+
+    def write(self):
+        """write the positions, orientations and scales of all the cubes in a single change block"""
+        positions = Vt.Vec3fArray.FromNumpy(self.positions)
+        orientations = Vt.QuathArray.FromNumpy(self.orientations())
+        scales = Vt.Vec3fArray.FromNumpy(self.scales)
+        with Sdf.ChangeBlock():
+            self._positions_spec.default = positions
+            self._orientations_spec.default = orientations
+            self._scales_spec.default = scales
+
+    def animate(self):
+        self.step()
+        self.write()
@@ -0,0 +1,135 @@
+import math
+import time
+
+import numpy as np
+
+# upper bounds of the frame time histogram buckets in milliseconds, the last bucket is unbounded
+FRAME_TIME_BUCKETS_MS = (1.0, 2.0, 4.0, 8.0, 16.0, 33.0, 66.0, 100.0, 250.0, 500.0)
+
+
+class FrameTimeHistogram:
+    def __init__(self, buckets_ms=FRAME_TIME_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = np.zeros(len(buckets_ms) + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def record(self, seconds):
+        self.counts[np.searchsorted(self.buckets_ms, seconds * 1000.0)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile_bound_ms(self, percentile):
+        """upper bound of the bucket of the percentile, inf if it is in the last bucket"""
+        if not self.count:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), math.ceil(self.count * percentile / 100.0)))
+        return self.buckets_ms[index] if index < len(self.buckets_ms) else math.inf
+
+    def __str__(self):
+        return (
+            f"mean: {self.mean * 1000.0:.2f} ms, p95 <= {self.percentile_bound_ms(95):g} ms, "
+            f"max: {self.max * 1000.0:.2f} ms"
+        )
+
+
+class FrameStats:
+    def __init__(self, rate):
+        self.rate = rate
+        self.frames = 0
+        self.skipped = 0
+        self.late = 0
+        self.elapsed = 0.0
+        self.write = FrameTimeHistogram()
+        self.flush = FrameTimeHistogram()
+        self.total = FrameTimeHistogram()
+
+    @property
+    def frames_per_second(self):
+        return self.frames / self.elapsed if self.elapsed > 0.0 else 0.0
+
+    def table(self):
+        """the histograms as text, one row per bucket with the frame counts of write, flush and total"""
+        buckets = self.write.buckets_ms
+        rows = [f"{'frame time':>12} {'write':>8} {'flush':>8} {'total':>8}"]
+        for index, count in enumerate(self.total.counts):
+            bucket = f"<= {buckets[index]:g} ms" if index < len(buckets) else f"> {buckets[-1]:g} ms"
+            rows.append(f"{bucket:>12} {self.write.counts[index]:>8} {self.flush.counts[index]:>8} {count:>8}")
+        return "\n".join(rows)
+
+    def export_csv(self, path):
+        """write the histograms as CSV, the bucket column is the upper bound in milliseconds"""
+        buckets = [*self.write.buckets_ms, math.inf]
+        with open(path, "w") as f:
+            f.write("bucket_ms,write,flush,total\n")
+            for index, bucket in enumerate(buckets):
+                f.write(f"{bucket},{self.write.counts[index]},{self.flush.counts[index]},{self.total.counts[index]}\n")
+
+    def __str__(self):
+        return (
+            f"frames: {self.frames}, skipped: {self.skipped}, late: {self.late}, "
+            f"rate: {self.frames_per_second:.1f} of {self.rate:g} fps, "
+            f"write {self.write}, flush {self.flush}, total {self.total}"
+        )
+
+
+class FrameScheduler:
+    """
+    Runs a frame loop at a target rate, timing the write and the flush of every frame.
+
+    Frame n is due n / rate seconds after the start on the performance counter, so the time spent in a
+    frame is subtracted from the wait for the next one instead of adding to it. A frame that starts
+    more than tolerance seconds after its deadline is counted as late. With skip_frames, the frames
+    whose deadline has already passed when a frame ends are skipped, so an overloaded loop keeps
+    to the timeline instead of falling further behind.
+    """
+
+    def __init__(self, rate=30.0, skip_frames=True, tolerance=0.002):
+        if rate <= 0.0:
+            raise ValueError(f"The frame rate must be positive: {rate}")
+        self.rate = rate
+        self.skip_frames = skip_frames
+        self.tolerance = tolerance
+        self.stats = FrameStats(rate)
+
+    def run(self, frames, write, flush):
+        """
+        runs write(frame) followed by flush() for the frames 0 to frames - 1, returns the FrameStats
+        """
+        stats = self.stats = FrameStats(self.rate)
+        period = 1.0 / self.rate
+        origin = time.perf_counter()
+        frame = 0
+        while frame < frames:
+            deadline = origin + frame * period
+            now = time.perf_counter()
+            if now < deadline:
+                time.sleep(deadline - now)
+            elif now - deadline > self.tolerance:
+                stats.late += 1
+
+            start = time.perf_counter()
+            write(frame)
+            written = time.perf_counter()
+            flush()
+            end = time.perf_counter()
+            stats.frames += 1
+            stats.write.record(written - start)
+            stats.flush.record(end - written)
+            stats.total.record(end - start)
+
+            frame += 1
+            if self.skip_frames:
+                # the last frame whose deadline has passed is run next
+                due = min(int((end - origin) * self.rate), frames)
+                if due > frame:
+                    stats.skipped += due - frame
+                    frame = due
+        stats.elapsed = time.perf_counter() - origin
+        return stats
@@ -0,0 +1,133 @@
+import concurrent.futures
+import time
+
+from pxr import Sdf, Tf
+
+
+class IotCheckpointStats:
+    def __init__(self):
+        self.checkpoints = 0
+        self.skipped = 0
+        self.restored = 0
+        self.total_save_time = 0.0
+        self.max_save_time = 0.0
+
+    def __str__(self):
+        checkpoints = max(self.checkpoints, 1)
+        return (
+            f"checkpoints: {self.checkpoints}, skipped: {self.skipped}, restored values: {self.restored}, "
+            f"save time mean: {self.total_save_time / checkpoints * 1000.0:.2f} ms "
+            f"max: {self.max_save_time * 1000.0:.2f} ms"
+        )
+
+
+class IotCheckpoint:
+    """
+    Periodically snapshots the IoT prim specs of a live layer into a regular layer, so that the
+    latest values survive a restart of the connector or of the live session.
+
+    checkpoint() copies the root_path prim with all its children into an anonymous layer in a single
+    Sdf.CopySpec and exports it to url on a background thread, so the caller is only blocked by the
+    in-memory copy. A checkpoint is skipped while the previous one is still being saved. It must be
+    called from the thread that edits the layer, e.g. between flushes.
+
+    restore() writes the checkpointed values of the prims that exist in the layer back to it in a
+    single change block, creating the missing attributes, and returns them so that the last-value
+    caches of the connector can be seeded.
+    """
+
+    def __init__(self, layer: Sdf.Layer, url, interval=30.0, root_path="/iot"):
+        self.layer = layer
+        self.url = url
+        self.interval = interval
+        self.root_path = Sdf.Path(root_path)
+        self.stats = IotCheckpointStats()
+        self._last_checkpoint = time.monotonic()
+        self._executor = None
+        self._saving = None
+
+    def is_due(self):
+        return self.interval > 0 and time.monotonic() - self._last_checkpoint >= self.interval
+
+    def checkpoint_if_due(self):
+        if self.is_due():
+            self.checkpoint()
+
+    def checkpoint(self):
+        """snapshot the prim specs and save them in the background, returns False if skipped"""
+        self._last_checkpoint = time.monotonic()
+        if self._saving is not None and not self._saving.done():
+            self.stats.skipped += 1
+            return False
+        if self._saving is not None:
+            # surface the error of the previous save
+            self._saving.result()
+
+        snapshot = self.capture()
+        if snapshot is None:
+            return False
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="iot_checkpoint")
+        self._saving = self._executor.submit(self._save, snapshot)
+        return True
+
+    def capture(self):
+        """copy of the prim specs in an anonymous layer, None if the layer has no IoT root"""
+        if not self.layer.GetPrimAtPath(self.root_path):
+            return None
+        snapshot = Sdf.Layer.CreateAnonymous("iot_checkpoint")
+        if not Sdf.CopySpec(self.layer, self.root_path, snapshot, self.root_path):
+            raise Exception(f"Could not copy {self.root_path} to the checkpoint.")
+        return snapshot
+
+    def close(self):
+        """save a final checkpoint and wait for it"""
+        if self.interval > 0:
+            if self._saving is not None:
+                self._saving.result()
+            self.checkpoint()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._saving is not None:
+            self._saving.result()
+
+    def restore(self):
+        """returns {prim name: [(attribute id, value)]} of the values written back to the layer"""
+        try:
+            checkpoint = Sdf.Layer.FindOrOpen(self.url)
+        except Tf.ErrorException:
+            # a local checkpoint that does not exist yet
+            checkpoint = None
+        checkpoint_root = checkpoint.GetPrimAtPath(self.root_path) if checkpoint else None
+        if not checkpoint_root:
+            return {}
+
+        restored = {}
+        with Sdf.ChangeBlock():
+            for checkpoint_spec in checkpoint_root.nameChildren.values():
+                prim_spec = self.layer.GetPrimAtPath(checkpoint_spec.path)
+                if not prim_spec:
+                    continue
+                items = restored[checkpoint_spec.name] = []
+                for checkpoint_attr in checkpoint_spec.attributes:
+                    if not checkpoint_attr.HasDefaultValue():
+                        continue
+                    attr = self.layer.GetAttributeAtPath(checkpoint_attr.path)
+                    if not attr:
+                        attr = Sdf.AttributeSpec(prim_spec, checkpoint_attr.name, checkpoint_attr.typeName)
+                    elif attr.typeName != checkpoint_attr.typeName:
+                        continue
+                    attr.default = checkpoint_attr.default
+                    items.append((checkpoint_attr.name, checkpoint_attr.default))
+                self.stats.restored += len(items)
+        return restored
+
+    def _save(self, snapshot):
+        start = time.perf_counter()
+        if not snapshot.Export(self.url):
+            raise Exception(f"Could not save the checkpoint {self.url}.")
+        elapsed = time.perf_counter() - start
+        self.stats.checkpoints += 1
+        self.stats.total_save_time += elapsed
+        self.stats.max_save_time = max(self.stats.max_save_time, elapsed)
@@ -0,0 +1,175 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .playback_cache import PlaybackCache
+from .playback_matrix import PlaybackMatrix
+
+
+class IotCsvSchema:
+    """
+    Describes the columns of an IoT CSV export so that it can be parsed without type inference.
+
+    The export is expected in long format, one reading per row:
+        TimeStamp,Id,Value
+    with the rows ordered by TimeStamp.
+
+    engine may be "c" (the default pandas parser) or "pyarrow", which requires pyarrow to be installed.
+    """
+
+    def __init__(
+        self,
+        timestamp_column="TimeStamp",
+        id_column="Id",
+        value_column="Value",
+        timestamp_format="ISO8601",
+        value_dtype="float64",
+        engine="c",
+    ):
+        self.timestamp_column = timestamp_column
+        self.id_column = id_column
+        self.value_column = value_column
+        self.timestamp_format = timestamp_format
+        self.value_dtype = value_dtype
+        self.engine = engine
+
+    @property
+    def columns(self):
+        return [self.timestamp_column, self.id_column, self.value_column]
+
+    @property
+    def dtypes(self):
+        # timestamps are read as text and parsed with the explicit format
+        return {self.timestamp_column: str, self.id_column: str, self.value_column: self.value_dtype}
+
+
+class IotCsvBlock(NamedTuple):
+    matrix: PlaybackMatrix
+    # attribute ids seen for the first time in this block
+    new_ids: list
+
+
+class IotCsvReader:
+    """
+    Streams an IoT CSV export in chunks and yields the readings pivoted into a row per second.
+
+    Only one chunk plus the readings of a single second are held in memory at any time. The attribute
+    ids are discovered while streaming, every block reports the ids that have not been seen before so
+    the matching attributes can be created right before their first value is written.
+
+    With cache, blocks() memory maps the PlaybackCache of the file when it is valid, and builds the
+    cache while streaming the file otherwise.
+    """
+
+    def __init__(self, path, schema=None, chunk_size=100_000, cache=False):
+        self.path = path
+        self.schema = schema or IotCsvSchema()
+        self.chunk_size = chunk_size
+        self.cache = PlaybackCache(path, self.schema) if cache else None
+        self.attribute_ids = []
+        self._known_ids = set()
+
+    def blocks(self):
+        """
+        Yields the readings pivoted into a PlaybackMatrix per chunk. The matrix columns follow
+        attribute_ids, so the column of an attribute is the same in every block.
+        """
+        if self.cache is None:
+            yield from self._parse_blocks()
+            return
+
+        matrix = self.cache.load()
+        if matrix is not None:
+            yield from self._cached_blocks(matrix)
+            return
+
+        writer = self.cache.writer()
+        complete = False
+        try:
+            for block in self._parse_blocks():
+                writer.add(block.matrix)
+                yield block
+            complete = True
+        finally:
+            if complete:
+                writer.commit(self.attribute_ids)
+            else:
+                writer.abort()
+
+    def _cached_blocks(self, matrix):
+        new_ids = self._discover(matrix.attribute_ids)
+        ticks = max(1, self.chunk_size // max(1, len(matrix.attribute_ids)))
+        for start in range(0, len(matrix), ticks):
+            end = start + ticks
+            block = PlaybackMatrix(matrix.timestamps[start:end], matrix.attribute_ids, matrix.values[start:end])
+            yield IotCsvBlock(block, new_ids)
+            new_ids = []
+
+    def _parse_blocks(self):
+        for data in self._whole_seconds():
+            new_ids = self._discover(data[self.schema.id_column].unique())
+            yield IotCsvBlock(PlaybackMatrix.from_frame(data, self.schema, self.attribute_ids), new_ids)
+
+    def _whole_seconds(self):
+        ts_column = self.schema.timestamp_column
+        pending = None
+        for chunk in self._read_chunks():
+            if chunk.empty:
+                continue
+
+            # Converting to DateTime Format and drop ms
+            chunk[ts_column] = pd.to_datetime(chunk[ts_column], format=self.schema.timestamp_format).dt.floor("s")
+            if pending is not None:
+                chunk = pd.concat([pending, chunk], ignore_index=True)
+
+            # the last second may continue in the next chunk, hold it back
+            is_last = chunk[ts_column] == chunk[ts_column].iat[-1]
+            pending = chunk[is_last]
+            if not is_last.all():
+                yield chunk[~is_last]
+
+        if pending is not None:
+            yield pending
+
+    def _discover(self, ids):
+        new_ids = [id for id in ids if id not in self._known_ids]
+        self._known_ids.update(new_ids)
+        self.attribute_ids.extend(new_ids)
+        return new_ids
+
+    def _read_chunks(self):
+        schema = self.schema
+        if schema.engine == "pyarrow":
+            yield from self._read_chunks_pyarrow()
+            return
+
+        with pd.read_csv(
+            self.path,
+            usecols=schema.columns,
+            dtype=schema.dtypes,
+            engine=schema.engine,
+            chunksize=self.chunk_size,
+        ) as reader:
+            for chunk in reader:
+                yield chunk
+
+    def _read_chunks_pyarrow(self):
+        # pandas does not support chunksize with the pyarrow engine, use the pyarrow streaming reader instead
+        # pip install pyarrow
+        import pyarrow as pa
+        from pyarrow import csv
+
+        schema = self.schema
+        column_types = {
+            schema.timestamp_column: pa.string(),
+            schema.id_column: pa.string(),
+            schema.value_column: pa.from_numpy_dtype(np.dtype(schema.value_dtype)),
+        }
+        reader = csv.open_csv(
+            self.path,
+            read_options=csv.ReadOptions(block_size=1 << 22),
+            convert_options=csv.ConvertOptions(column_types=column_types, include_columns=schema.columns),
+        )
+        for batch in reader:
+            yield batch.to_pandas()
@@ -0,0 +1,64 @@
+import asyncio
+import heapq
+import itertools
+from pathlib import Path
+from typing import NamedTuple
+
+IOT_DATA_SUFFIX = "_iot_data.csv"
+
+
+class IotDeviceTick(NamedTuple):
+    timestamp: object
+    topic: str
+    # row of the device PlaybackMatrix and the attribute ids of its columns
+    values: object
+    attribute_ids: list
+    # attribute ids seen for the first time, they need to be created before the values are written
+    new_ids: list
+
+
+def discover_device_topics(content_dir):
+    """returns the device topics of all the {topic}_iot_data.csv files in the content folder"""
+    return sorted(path.name[: -len(IOT_DATA_SUFFIX)] for path in Path(content_dir).glob(f"*{IOT_DATA_SUFFIX}"))
+
+
+def device_ticks(topic, reader):
+    """yields an IotDeviceTick for every tick streamed by the device IotCsvReader"""
+    for matrix, new_ids in reader.blocks():
+        for timestamp, values in matrix:
+            yield IotDeviceTick(timestamp, topic, values, matrix.attribute_ids, new_ids)
+            new_ids = []
+
+
+def merge_device_ticks(readers):
+    """
+    Merges the streams of several devices onto a single timeline.
+
+    readers maps the device topic to its IotCsvReader. Yields the timestamp and the list of
+    IotDeviceTick of all the devices that have readings at that timestamp, in timestamp order.
+    Only the current chunk of every device is held in memory.
+    """
+    streams = [device_ticks(topic, reader) for topic, reader in readers.items()]
+    merged = heapq.merge(*streams, key=lambda tick: tick.timestamp)
+    for timestamp, ticks in itertools.groupby(merged, key=lambda tick: tick.timestamp):
+        yield timestamp, list(ticks)
+
+
+async def merge_device_ticks_async(readers, batch_size=64):
+    """
+    merge_device_ticks() for the event loop. The ticks are pulled in batches of batch_size in the default
+    executor, the next batch while the current one is consumed, so that parsing the CSV chunks and writing
+    the cache spools never blocks the loop.
+    """
+    ticks = merge_device_ticks(readers)
+
+    def pull():
+        return list(itertools.islice(ticks, batch_size))
+
+    loop = asyncio.get_running_loop()
+    batch = await loop.run_in_executor(None, pull)
+    while batch:
+        next_batch = loop.run_in_executor(None, pull)
+        for item in batch:
+            yield item
+        batch = await next_batch
@@ -0,0 +1,58 @@
+class LatestValueQueueStats:
+    def __init__(self):
+        self.enqueued = 0
+        self.merged = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def __str__(self):
+        return (
+            f"enqueued: {self.enqueued}, merged: {self.merged}, dropped: {self.dropped}, max depth: {self.max_depth}"
+        )
+
+
+class LatestValueQueue:
+    """
+    Bounded buffer of the attribute updates received between two flushes that only keeps the latest value
+    per attribute. It is filled and drained on the event loop, so it needs no locking.
+
+    Updates are grouped by key, e.g. the MQTT topic of a device. A value for an attribute that is already
+    pending replaces it and counts as merged. The depth is the number of pending attribute values, a new
+    attribute that would exceed capacity is dropped, updates of pending attributes are always accepted.
+    """
+
+    def __init__(self, capacity=100_000):
+        self.capacity = capacity
+        self.stats = LatestValueQueueStats()
+        self._pending = {}
+        self._depth = 0
+
+    @property
+    def depth(self):
+        return self._depth
+
+    def put(self, key, items):
+        """merge (attribute id, value) pairs, never blocks"""
+        stats = self.stats
+        values = self._pending.get(key)
+        if values is None:
+            values = self._pending[key] = {}
+        for id, value in items:
+            stats.enqueued += 1
+            if id in values:
+                stats.merged += 1
+            elif self._depth >= self.capacity:
+                stats.dropped += 1
+                continue
+            else:
+                self._depth += 1
+            values[id] = value
+        stats.max_depth = max(stats.max_depth, self._depth)
+
+    def drain(self):
+        """take all the pending updates as {key: {attribute id: value}}"""
+        pending = self._pending
+        self._pending = {}
+        self._depth = 0
+        return pending
+
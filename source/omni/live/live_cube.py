@@ -1,9 +1,19 @@
+import math
 import random
 from pxr import Usd, Gf, UsdGeom, Sdf, UsdShade
 
 
-class LiveCube:
-    def __init__(self, stage: Usd.Stage):
+class CubeFactory:
+    """
+    Authors the cube mesh and its material binding once, as a prototype below a class prim, and creates
+    the cubes as instanceable references to it.
+
+    The prim spec of a cube only holds the reference, the instanceable flag and its xform ops, so the
+    authoring time, the layer size and the live deltas of an additional cube don't depend on the mesh.
+    create_many() authors all the cubes in one change block with Sdf, without a Usd notice per cube.
+    """
+
+    def __init__(self, stage: Usd.Stage, prototype_path="/Prototypes/cube"):
         points = [
             (50, 50, 50),
             (-50, 50, 50),
@@ -17,22 +27,28 @@ class LiveCube:
         faceVertexIndices = [0, 1, 2, 3, 4, 5, 6, 7, 0, 6, 5, 1, 4, 7, 3, 2, 0, 3, 7, 6, 4, 2, 1, 5]
         faceVertexCounts = [4, 4, 4, 4, 4, 4]
 
-        cube = stage.GetPrimAtPath("/World/cube")
-        if not cube:
-            cube = stage.DefinePrim("/World/cube", "Cube")
+        self.stage = stage
+        self.prototype_path = Sdf.Path(prototype_path)
 
-        if not cube:
-            raise Exception("Could load the cube: /World/cube.")
+        # the class prim is not rendered itself, only the cubes that reference the prototype below it
+        root_path = self.prototype_path.GetPrefixes()[0]
+        if not stage.GetPrimAtPath(root_path):
+            stage.CreateClassPrim(root_path)
+        if not stage.GetPrimAtPath(self.prototype_path):
+            prototype = stage.DefinePrim(self.prototype_path, "Xform")
+            # the mesh inherits the display color of the prototype, so that every cube can override it
+            UsdGeom.PrimvarsAPI(prototype).CreatePrimvar(
+                "displayColor", Sdf.ValueTypeNames.Color3fArray, UsdGeom.Tokens.constant
+            ).Set([(0.463, 0.725, 0.0)])
 
-        self.mesh = stage.GetPrimAtPath("/World/cube/mesh")
+        self.mesh = UsdGeom.Mesh(stage.GetPrimAtPath(self.prototype_path.AppendChild("mesh")))
         if not self.mesh:
-            self.mesh = UsdGeom.Mesh.Define(stage, "/World/cube/mesh")
+            self.mesh = UsdGeom.Mesh.Define(stage, self.prototype_path.AppendChild("mesh"))
             self.mesh.CreatePointsAttr().Set(points)
             self.mesh.CreateFaceVertexIndicesAttr().Set(faceVertexIndices)
             self.mesh.CreateFaceVertexCountsAttr().Set(faceVertexCounts)
             self.mesh.CreateDoubleSidedAttr().Set(False)
             self.mesh.CreateSubdivisionSchemeAttr("bilinear")
-            self.mesh.CreateDisplayColorAttr().Set([(0.463, 0.725, 0.0)])
             self.mesh.AddTranslateOp().Set(Gf.Vec3d(0.0))
             self.mesh.AddScaleOp().Set(Gf.Vec3f(0.8535))
             self.mesh.AddTransformOp().Set(Gf.Matrix4d(1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1))
@@ -41,15 +57,69 @@ class LiveCube:
             )
             texCoords.Set([(0, 0), (1, 0), (1, 1), (0, 1)])
 
-        self._rotationIncrement = Gf.Vec3f(
-            random.uniform(-1.0, 1.0) * 10.0, random.uniform(-1.0, 1.0) * 10.0, random.uniform(-1.0, 1.0) * 10.0
-        )
-
         material = UsdShade.Material.Define(stage, '/World/Looks/Plastic_Yellow_A')
         if material:
             self.mesh.GetPrim().ApplyAPI(UsdShade.MaterialBindingAPI)
             UsdShade.MaterialBindingAPI(self.mesh).Bind(material)
 
+    def create(self, path, translation=None):
+        """define an instanceable cube at path, optionally translated, returns its prim"""
+        with Sdf.ChangeBlock():
+            self._define(self._create_spec(path), translation)
+        return self.stage.GetPrimAtPath(path)
+
+    def create_many(self, parent_path, count, spacing=150.0):
+        """
+        define count cubes named cube_{index} below parent_path on a square grid in the XZ plane,
+        returns their paths
+        """
+        side = math.ceil(math.sqrt(count))
+        paths = []
+        with Sdf.ChangeBlock():
+            parent = self._create_spec(parent_path)
+            for index in range(count):
+                name = f"cube_{index}"
+                paths.append(Sdf.Path(parent_path).AppendChild(name))
+                if name in parent.nameChildren:
+                    # created by a previous run
+                    continue
+                x = (index % side - (side - 1) / 2.0) * spacing
+                z = (index // side - (side - 1) / 2.0) * spacing
+                self._define(Sdf.PrimSpec(parent, name, Sdf.SpecifierDef, "Xform"), (x, 0.0, z))
+        return paths
+
+    def _create_spec(self, path):
+        """the def prim spec of path in the edit target layer, missing ancestors are authored as overs"""
+        edit_target = self.stage.GetEditTarget()
+        spec = Sdf.CreatePrimInLayer(edit_target.GetLayer(), edit_target.MapToSpecPath(Sdf.Path(path)))
+        spec.specifier = Sdf.SpecifierDef
+        if not spec.typeName:
+            spec.typeName = "Xform"
+        return spec
+
+    def _define(self, spec, translation):
+        spec.referenceList.Prepend(Sdf.Reference(primPath=self.prototype_path))
+        spec.instanceable = True
+        if translation is not None:
+            translate = Sdf.AttributeSpec(spec, "xformOp:translate", Sdf.ValueTypeNames.Double3)
+            translate.default = Gf.Vec3d(*translation)
+            order = Sdf.AttributeSpec(spec, "xformOpOrder", Sdf.ValueTypeNames.TokenArray, Sdf.VariabilityUniform)
+            order.default = ["xformOp:translate"]
+
+
+class LiveCube:
+    def __init__(self, stage: Usd.Stage, path="/World/cube", factory: CubeFactory = None):
+        cube = stage.GetPrimAtPath(path)
+        if not cube:
+            cube = (factory or CubeFactory(stage)).create(path)
+
+        if not cube:
+            raise Exception(f"Could load the cube: {path}.")
+
+        self._rotationIncrement = Gf.Vec3f(
+            random.uniform(-1.0, 1.0) * 10.0, random.uniform(-1.0, 1.0) * 10.0, random.uniform(-1.0, 1.0) * 10.0
+        )
+
         self._rotateXYZOp = None
         self._scale = None
         self._translate = None
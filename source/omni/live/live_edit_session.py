@@ -1,7 +1,10 @@
+import asyncio
 import os
+import re
 
 from .nucleus_client_error import NucleusClientError
-from .nucleus_server_config import nucleus_server_config
+from .nucleus_server_config import nucleus_server_config_async
+from .storage_backend import NucleusStorage
 import omni.client
 from pxr import Sdf
 
@@ -17,56 +20,97 @@ class LiveEditSession:
     session_folder_url: {root_folder}/.live/{usd-file-name}.live
     live_session_url: {session_folder_url}/{session-name}/root.live
     toml_url: {session_folder_url}/{session-name}/__session__.toml
+    shard layers: {session_folder_url}/{session-name}/shard_{index}.live
+
+    The layers end with the live extension of the storage, .live.usdc for the LocalStorage.
     """
 
-    def __init__(self, stage_url):
+    def __init__(self, stage_url, storage=None):
         self.session_name = "iot_session"
         self.stage_url = stage_url
+        self.storage = storage or NucleusStorage()
         self.omni_url = omni.client.break_url(self.stage_url)
 
         root_folder = self._make_root_folder_path()
         self.session_folder_url = self._make_url(root_folder)
         live_session_folder = f"{root_folder}/{self.session_name}.live"
-        self.live_session_url = self._make_url(f"{live_session_folder}/root.live")
+        self.live_session_folder_url = self._make_url(live_session_folder)
+        self.live_session_url = self._make_url(f"{live_session_folder}/root{self.storage.live_extension}")
         self.toml_url = self._make_url(f"{live_session_folder}/__session__.toml")
 
     async def ensure_exists(self):
         """Either find an existing live edit session or create a new one"""
-        # get the folder contains the sessions and list the available sessions
-        _result, sessions = await omni.client.list_async(self.session_folder_url)
-
-        for entry in sessions:
-            session_name = os.path.splitext(entry.relative_path)[0]
-            if session_name == self.session_name:
-                # session exists so exit
-                return self._ensure_live_layer()
-
-        # create new session
-        # first create the toml file
-        self._write_session_toml()
-        return self._ensure_live_layer()
-
-    def _ensure_live_layer(self):
-        # create a new root.live session file
-        live_layer = Sdf.Layer.FindOrOpen(self.live_session_url)
+        # list the available sessions, get the server info for the session toml and open the live layer
+        # concurrently, the server info is cached per host and only required for a new session
+        listing, session_config, live_layer = await asyncio.gather(
+            self.storage.list_async(self.session_folder_url),
+            nucleus_server_config_async(self),
+            self._run_blocking(self.storage.find_or_open_layer, self.live_session_url),
+            return_exceptions=True,
+        )
+        # the server config is only needed to create the session
+        for result in (listing, live_layer):
+            if isinstance(result, BaseException):
+                raise result
+        _result, sessions = listing
+
+        session_exists = any(os.path.splitext(entry.relative_path)[0] == self.session_name for entry in sessions)
+        if not session_exists:
+            if isinstance(session_config, BaseException):
+                raise session_config
+            # create new session
+            # first create the toml file
+            await self._write_session_toml(session_config)
         if not live_layer:
-            live_layer = Sdf.Layer.CreateNew(self.live_session_url)
-            if not live_layer:
-                raise Exception(f"Could load the live layer {self.live_session_url}.")
+            live_layer = await self._run_blocking(self._create_live_layer, self.live_session_url)
+        return live_layer
+
+    def shard_layer_url(self, index):
+        return f"{self.live_session_folder_url}/shard_{index}{self.storage.live_extension}"
+
+    async def ensure_shard_layers(self, live_layer, count):
+        """
+        Find or create the live sublayers of count shards concurrently, so that every writer process
+        owns a layer of the session. The root live layer composes all the shards.
+        """
+        shard_urls = [self.shard_layer_url(index) for index in range(count)]
+        shard_layers = await asyncio.gather(
+            *(self._run_blocking(self._find_or_create_live_layer, shard_url) for shard_url in shard_urls)
+        )
+        # the shards of an earlier run with a different number of shards are dropped
+        self.remove_shard_layers(live_layer)
+        for shard_layer in shard_layers:
+            live_layer.subLayerPaths.append(shard_layer.identifier)
+        return [shard_layer.identifier for shard_layer in shard_layers]
+
+    def remove_shard_layers(self, live_layer):
+        """remove the shard sublayers of an earlier sharded run from the root live layer, returns their paths"""
+        pattern = re.compile(rf"shard_\d+{re.escape(self.storage.live_extension)}")
+        shard_paths = [path for path in live_layer.subLayerPaths if pattern.fullmatch(os.path.basename(path))]
+        for path in shard_paths:
+            live_layer.subLayerPaths.remove(path)
+        return shard_paths
+
+    @staticmethod
+    async def _run_blocking(function, *args):
+        # the layer calls block until Nucleus responds, keep the event loop running meanwhile
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
 
-            Sdf.PrimSpec(live_layer, "iot", Sdf.SpecifierDef, "IoT Root")
-            live_layer.Save()
+    def _find_or_create_live_layer(self, url):
+        return self.storage.find_or_open_layer(url) or self._create_live_layer(url)
 
+    def _create_live_layer(self, url):
+        # create a new .live session file
+        live_layer = self.storage.create_layer(url)
+        if not live_layer:
+            raise Exception(f"Could load the live layer {url}.")
+
+        Sdf.PrimSpec(live_layer, "iot", Sdf.SpecifierDef, "IoT Root")
+        live_layer.Save()
         return live_layer
 
     def _make_url(self, path):
-        return omni.client.make_url(
-            self.omni_url.scheme,
-            self.omni_url.user,
-            self.omni_url.host,
-            self.omni_url.port,
-            path,
-        )
+        return self.storage.make_url(self.omni_url, path)
 
     def _make_root_folder_path(self):
         """
@@ -77,7 +121,7 @@ class LiveEditSession:
 
         return f"{os.path.dirname(self.omni_url.path)}/.live/{stage_file_name}.live"
 
-    def _write_session_toml(self):
+    async def _write_session_toml(self, session_config):
         """
         writes the session toml to Nucleus
             OWNER_KEY = "user_name"
@@ -86,11 +130,9 @@ class LiveEditSession:
                                 "auto_authoring", "project_authoring")
             SESSION_NAME_KEY = "session_name"
         """
-        session_config = nucleus_server_config(self)
-
         toml_string = "".join([f'{key} = "{value}"\n' for (key, value) in session_config.items()])
 
-        result = omni.client.write_file(self.toml_url, self._toml_bytes(toml_string))
+        result = await self.storage.write_file_async(self.toml_url, self._toml_bytes(toml_string))
 
         if result != omni.client.Result.OK:
             raise NucleusClientError(
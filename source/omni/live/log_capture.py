@@ -0,0 +1,110 @@
+import collections
+import queue
+import threading
+import time
+
+import omni.client
+
+
+def parse_log_level(name):
+    """returns the omni.client.LogLevel for a name such as "debug" or "warning" """
+    return getattr(omni.client.LogLevel, name.upper())
+
+
+class LogCaptureStats:
+    def __init__(self):
+        self.captured = 0
+        self.rate_limited = 0
+        self.evicted = 0
+        self.sink_dropped = 0
+        self.handler_time = 0.0
+
+    def __str__(self):
+        return (
+            f"captured: {self.captured}, rate limited: {self.rate_limited}, evicted: {self.evicted}, "
+            f"file sink dropped: {self.sink_dropped}, handler time: {self.handler_time * 1000.0:.2f} ms"
+        )
+
+
+class LogCapture:
+    """
+    Captures the omni.client log messages in a fixed size ring buffer, so that they can be printed
+    when the connector fails without growing for the lifetime of the process.
+
+    level is passed to omni.client.set_log_level, so messages below it never reach Python.
+    At most rate_limit messages per second are captured, the excess is counted and dropped.
+    With file_path the captured messages are also appended to a file by a background thread,
+    messages are dropped when the thread can't keep up rather than blocking the caller.
+    """
+
+    def __init__(
+        self, capacity=1000, level=omni.client.LogLevel.WARNING, rate_limit=100, file_path=None, file_queue_size=10000
+    ):
+        self.level = level
+        self.rate_limit = rate_limit
+        self.stats = LogCaptureStats()
+        self._messages = collections.deque(maxlen=capacity)
+        self._window = 0
+        self._window_count = 0
+        self._file_queue = None
+        self._file_thread = None
+        if file_path:
+            self._file_queue = queue.Queue(maxsize=file_queue_size)
+            self._file_thread = threading.Thread(
+                target=self._write_file, args=(file_path,), name="LogCaptureFileSink", daemon=True
+            )
+            self._file_thread.start()
+
+    @property
+    def messages(self):
+        return list(self._messages)
+
+    def install(self):
+        omni.client.set_log_level(self.level)
+        omni.client.set_log_callback(self.log_handler)
+
+    def log_handler(self, thread, component, level, message):
+        start = time.perf_counter()
+        stats = self.stats
+        # fixed one second windows are enough to bound a burst of messages
+        window = int(time.monotonic())
+        if window != self._window:
+            self._window = window
+            self._window_count = 0
+        self._window_count += 1
+        if self.rate_limit and self._window_count > self.rate_limit:
+            stats.rate_limited += 1
+        else:
+            entry = (thread, component, level, message)
+            if len(self._messages) == self._messages.maxlen:
+                stats.evicted += 1
+            self._messages.append(entry)
+            stats.captured += 1
+            if self._file_queue is not None:
+                try:
+                    self._file_queue.put_nowait(entry)
+                except queue.Full:
+                    stats.sink_dropped += 1
+        stats.handler_time += time.perf_counter() - start
+
+    def dump(self):
+        print("---- LOG MESSAGES ---")
+        print(*self._messages, sep="\n")
+        print(f"---- {self.stats}")
+
+    def close(self):
+        if self._file_thread is not None:
+            self._file_queue.put(None)
+            self._file_thread.join()
+            self._file_thread = None
+
+    def _write_file(self, file_path):
+        with open(file_path, "a", encoding="utf-8") as f:
+            while True:
+                entry = self._file_queue.get()
+                if entry is None:
+                    break
+                thread, component, level, message = entry
+                f.write(f"{thread}\t{component}\t{level}\t{message}\n")
+                if self._file_queue.empty():
+                    f.flush()
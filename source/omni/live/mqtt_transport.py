@@ -0,0 +1,206 @@
+import asyncio
+from typing import NamedTuple
+
+from .async_mqtt_loop import AsyncMqttLoop
+
+
+class MqttMessage(NamedTuple):
+    topic: str
+    payload: bytes
+    qos: int
+
+
+def topic_matches(topic_filter, topic):
+    """MQTT topic filter matching, + matches one level and # any number of trailing levels"""
+    filter_levels = topic_filter.split("/")
+    levels = topic.split("/")
+    # wildcards at the first level don't match the $SYS topics of the broker
+    if topic.startswith("$") and filter_levels[0] in ("+", "#"):
+        return False
+    for i, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if i >= len(levels) or (level != "+" and level != levels[i]):
+            return False
+    return len(filter_levels) == len(levels)
+
+
+class PahoTransport:
+    """
+    MQTT transport of a paho client on a network broker, driven by the asyncio event loop.
+
+    Transports call on_message(message) for every message of the subscriptions. publish() returns
+    None for QoS 0 and a future that resolves when the broker acknowledged the message for QoS 1.
+    The subscriptions are renewed when the client reconnects.
+    """
+
+    def __init__(self, host, port=1883, client_id=""):
+        # pip install paho-mqtt
+        from paho.mqtt import client as mqtt_client
+
+        self.host = host
+        self.port = port
+        self.on_message = None
+        self.client = mqtt_client.Client(client_id)
+        self._subscriptions = {}
+        self._acks = {}
+        self._mqtt_loop = None
+
+    async def connect(self):
+        client = self.client
+        client.on_connect = self._on_connect
+        client.on_message = self._on_message
+        client.on_publish = self._on_publish
+        self._mqtt_loop = AsyncMqttLoop(client)
+        client.connect(self.host, self.port)
+        rc = await self._mqtt_loop.connected
+        if rc != 0:
+            raise Exception(f"Failed to connect to the MQTT broker {self.host}:{self.port}, return code {rc}")
+
+    def subscribe(self, topic_filters, qos=0):
+        for topic_filter in topic_filters:
+            self._subscriptions[topic_filter] = qos
+        if self.client.is_connected():
+            self.client.subscribe([(topic_filter, qos) for topic_filter in topic_filters])
+
+    def publish(self, topic, payload, qos=0):
+        info = self.client.publish(topic, payload, qos)
+        if qos == 0:
+            return None
+        ack = self._acks[info.mid] = asyncio.get_running_loop().create_future()
+        return ack
+
+    async def disconnect(self):
+        await self._mqtt_loop.disconnect()
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc == 0 and self._subscriptions:
+            client.subscribe(list(self._subscriptions.items()))
+
+    def _on_message(self, client, userdata, msg):
+        self.on_message(MqttMessage(msg.topic, msg.payload, msg.qos))
+
+    def _on_publish(self, client, userdata, mid):
+        ack = self._acks.pop(mid, None)
+        if ack is not None and not ack.done():
+            ack.set_result(mid)
+
+
+class LoopbackBrokerStats:
+    def __init__(self):
+        self.published = 0
+        self.delivered = 0
+        self.acked = 0
+        self.unrouted = 0
+
+    def __str__(self):
+        return (
+            f"published: {self.published}, delivered: {self.delivered}, acked: {self.acked}, "
+            f"unrouted: {self.unrouted}"
+        )
+
+
+class LoopbackBroker:
+    """
+    In-process stand-in for an MQTT broker, so that the publisher to USD path can be load tested
+    without a network or a public broker.
+
+    Supports topic filters with + and # wildcards and QoS 0 and 1. A message is delivered to every
+    transport with a matching subscription at the lower of the publish and subscription QoS, on the
+    next iteration of the event loop like a message from the network. The subscribers of a topic are
+    resolved once and cached until the subscriptions change.
+    """
+
+    def __init__(self):
+        self.stats = LoopbackBrokerStats()
+        self._transports = []
+        self._routes = {}
+
+    def transport(self):
+        return LoopbackTransport(self)
+
+    def _attach(self, transport):
+        self._transports.append(transport)
+        self._routes.clear()
+
+    def _detach(self, transport):
+        self._transports.remove(transport)
+        self._routes.clear()
+
+    def _publish(self, topic, payload, qos):
+        stats = self.stats
+        stats.published += 1
+        routes = self._routes.get(topic)
+        if routes is None:
+            routes = self._routes[topic] = self._resolve(topic)
+
+        loop = asyncio.get_running_loop()
+        if not routes:
+            stats.unrouted += 1
+            if qos == 0:
+                return None
+            # a broker acknowledges a QoS 1 message even if nobody is subscribed to its topic
+            ack = loop.create_future()
+            ack.set_result(None)
+            return ack
+
+        acks = []
+        for transport, granted_qos in routes:
+            delivery_qos = min(qos, granted_qos)
+            ack = loop.create_future() if delivery_qos else None
+            loop.call_soon(transport._deliver, MqttMessage(topic, payload, delivery_qos), ack)
+            if ack is not None:
+                acks.append(ack)
+        stats.delivered += len(routes)
+        if qos == 0:
+            return None
+        # acknowledged once every subscriber has handled the message
+        return asyncio.gather(*acks)
+
+    def _resolve(self, topic):
+        routes = []
+        for transport in self._transports:
+            subscriptions = transport._subscriptions.items()
+            granted = [qos for topic_filter, qos in subscriptions if topic_matches(topic_filter, topic)]
+            if granted:
+                routes.append((transport, max(granted)))
+        return routes
+
+
+class LoopbackTransport:
+    """MQTT transport connected to a LoopbackBroker, same interface as PahoTransport."""
+
+    def __init__(self, broker: LoopbackBroker):
+        self.broker = broker
+        self.on_message = None
+        self._subscriptions = {}
+        self._connected = False
+
+    async def connect(self):
+        self.broker._attach(self)
+        self._connected = True
+
+    def subscribe(self, topic_filters, qos=0):
+        for topic_filter in topic_filters:
+            self._subscriptions[topic_filter] = min(qos, 1)
+        self.broker._routes.clear()
+
+    def publish(self, topic, payload, qos=0):
+        if not self._connected:
+            raise Exception("The loopback transport is not connected.")
+        return self.broker._publish(topic, payload, min(qos, 1))
+
+    async def disconnect(self):
+        if self._connected:
+            self._connected = False
+            self.broker._detach(self)
+
+    def _deliver(self, message, ack):
+        try:
+            if self._connected:
+                self.on_message(message)
+        finally:
+            # the publisher is acknowledged even if the subscriber failed, like a network broker
+            if ack is not None:
+                self.broker.stats.acked += 1
+                ack.set_result(None)
@@ -1,7 +1,47 @@
+import asyncio
+
 import omni.client
 
-def nucleus_server_config(live_edit_session):
-    _, server_info = omni.client.get_server_info(live_edit_session.stage_url)
+from .nucleus_client_error import NucleusClientError
+
+# host -> server info, or the task requesting it
+_server_info = {}
+
+
+async def get_server_info_async(url, storage=None):
+    """the server info of the host of url, requested once per host and shared by concurrent callers"""
+    host = omni.client.break_url(url).host
+    entry = _server_info.get(host)
+    if isinstance(entry, asyncio.Task) and entry.get_loop() is not asyncio.get_running_loop():
+        entry = None
+    if entry is None:
+        entry = _server_info[host] = asyncio.ensure_future(_request_server_info(url, storage))
+    if not isinstance(entry, asyncio.Task):
+        return entry
+
+    try:
+        server_info = await entry
+    except BaseException:
+        if _server_info.get(host) is entry:
+            del _server_info[host]
+        raise
+    _server_info[host] = server_info
+    return server_info
+
+
+async def _request_server_info(url, storage):
+    if storage is None:
+        result, server_info = await omni.client.get_server_info_async(url)
+    else:
+        result, server_info = await storage.get_server_info_async(url)
+    if result != omni.client.Result.OK:
+        raise NucleusClientError(f"Error getting the server info of {url}: {result}")
+    return server_info
+
+
+def nucleus_server_config(live_edit_session, server_info=None):
+    if server_info is None:
+        _, server_info = omni.client.get_server_info(live_edit_session.stage_url)
 
     return {
         "user_name": server_info.username,
@@ -10,3 +50,8 @@ def nucleus_server_config(live_edit_session):
         "name": live_edit_session.session_name,
         "version": "1.0",
     }
+
+
+async def nucleus_server_config_async(live_edit_session):
+    server_info = await get_server_info_async(live_edit_session.stage_url, live_edit_session.storage)
+    return nucleus_server_config(live_edit_session, server_info)
@@ -0,0 +1,122 @@
+import json
+
+import numpy as np
+
+DEFAULT_PAYLOAD_FORMAT = "json"
+PAYLOAD_FORMATS = ("json", "msgpack", "bin")
+# the reserved level in front of the payload format, so that a device named like a format isn't misrouted
+PAYLOAD_FORMAT_LEVEL = "fmt"
+
+
+def payload_topic(topic, format):
+    """the topic a payload of the format is published to, e.g. iot/device/fmt/bin, JSON keeps the plain topic"""
+    return topic if format == DEFAULT_PAYLOAD_FORMAT else f"{topic}/{PAYLOAD_FORMAT_LEVEL}/{format}"
+
+
+def parse_payload_topic(topic):
+    """splits a topic into the plain topic and the payload format of its trailing fmt/{format} levels, if any"""
+    base, _, format = topic.rpartition("/")
+    plain, _, level = base.rpartition("/")
+    if plain and level == PAYLOAD_FORMAT_LEVEL and format in PAYLOAD_FORMATS:
+        return plain, format
+    return topic, DEFAULT_PAYLOAD_FORMAT
+
+
+class JsonCodec:
+    """Compact JSON object of attribute id to value."""
+
+    name = "json"
+
+    def encode(self, items):
+        return json.dumps(dict(items), separators=(",", ":")).encode("utf-8")
+
+    def decode(self, payload):
+        return json.loads(payload).items()
+
+
+class MsgpackCodec:
+    """MessagePack map of attribute id to value, requires msgpack to be installed."""
+
+    name = "msgpack"
+
+    def __init__(self):
+        self._msgpack = None
+
+    def encode(self, items):
+        return self._module().packb(dict(items))
+
+    def decode(self, payload):
+        return self._module().unpackb(payload).items()
+
+    def _module(self):
+        # pip install msgpack
+        if self._msgpack is None:
+            import msgpack
+
+            self._msgpack = msgpack
+        return self._msgpack
+
+
+class BinaryCodec:
+    """
+    Fixed layout binary payload: little endian uint16 count, count uint16 attribute indices
+    and count float64 values.
+
+    The indices refer to attribute_ids, so the publisher and the subscriber must use the same list,
+    e.g. the ids of the same CSV export. The list may only be appended to while in use.
+    """
+
+    name = "bin"
+    index_dtype = np.dtype("<u2")
+    value_dtype = np.dtype("<f8")
+
+    def __init__(self, attribute_ids):
+        self.attribute_ids = attribute_ids
+        self._indices = {}
+
+    def encode(self, items):
+        indices = self._index_map()
+        ids = []
+        values = []
+        for id, value in items:
+            index = indices.get(id)
+            if index is None:
+                raise Exception(f"The attribute {id} is not in the payload schema.")
+            ids.append(index)
+            values.append(value)
+        return self.encode_indices(ids, values)
+
+    def encode_indices(self, indices, values):
+        """encode the values of the attributes at the indices of attribute_ids"""
+        count = np.array([len(indices)], dtype=self.index_dtype)
+        return b"".join(
+            (
+                count.tobytes(),
+                np.asarray(indices, dtype=self.index_dtype).tobytes(),
+                np.asarray(values, dtype=self.value_dtype).tobytes(),
+            )
+        )
+
+    def decode(self, payload):
+        indices, values = self.decode_indices(payload)
+        attribute_ids = self.attribute_ids
+        return zip([attribute_ids[index] for index in indices.tolist()], values.tolist())
+
+    def decode_indices(self, payload):
+        """returns the attribute indices and the values as arrays"""
+        count = int(np.frombuffer(payload, dtype=self.index_dtype, count=1)[0])
+        offset = self.index_dtype.itemsize
+        indices = np.frombuffer(payload, dtype=self.index_dtype, count=count, offset=offset)
+        offset += count * self.index_dtype.itemsize
+        values = np.frombuffer(payload, dtype=self.value_dtype, count=count, offset=offset)
+        return indices, values
+
+    def _index_map(self):
+        if len(self._indices) != len(self.attribute_ids):
+            self._indices = {id: index for index, id in enumerate(self.attribute_ids)}
+        return self._indices
+
+
+def make_payload_codecs(attribute_ids):
+    """one codec per payload format, the binary codec uses attribute_ids as its schema"""
+    return {codec.name: codec for codec in (JsonCodec(), MsgpackCodec(), BinaryCodec(attribute_ids))}
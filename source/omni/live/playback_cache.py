@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .playback_matrix import PlaybackMatrix
+
+CACHE_VERSION = 2
+
+
+class PlaybackCache:
+    """
+    Persists the parsed and pivoted data of an IoT CSV export next to the source file,
+    so that later startups can memory map it instead of parsing the text again.
+
+    Folder layout: {csv file}.cache/
+        meta.json       attribute ids, timezone, the key of the source file and the current build
+        {build}/
+            values.npy      float64 playback matrix, one row per tick and one column per attribute
+            timestamps.npy  int64 nanoseconds since epoch (UTC) of each tick
+
+    Every writer assembles its own build folder and then publishes it by replacing meta.json atomically,
+    so processes that read or build the cache of the same file at the same time, e.g. the CSV and the
+    MQTT apps or the shard workers, never remove the files of each other. The superseded builds are
+    removed by the next commit, a reader that loses the race to a removed build parses the file again.
+
+    The cache is keyed by the size, modification time and SHA-256 of the source file and the schema
+    used to parse it. The hash is only computed when the file is cached and when the size matches but
+    the modification time changed, e.g. after the file has been copied.
+    """
+
+    def __init__(self, csv_path, schema):
+        self.csv_path = Path(csv_path)
+        self.schema = schema
+        self.folder = self.csv_path.with_name(f"{self.csv_path.name}.cache")
+
+    def load(self):
+        """returns the memory mapped PlaybackMatrix, or None if there is no valid cache"""
+        meta = self._read_meta()
+        if meta is None or not self._is_valid(meta):
+            return None
+
+        build = self.folder / meta["build"]
+        try:
+            values = np.load(build / "values.npy", mmap_mode="r")
+            timestamps = pd.DatetimeIndex(np.load(build / "timestamps.npy").view("datetime64[ns]"))
+        except OSError:
+            # superseded by another build and removed since the meta data was read
+            return None
+        if meta["timezone"]:
+            timestamps = timestamps.tz_localize("UTC").tz_convert(meta["timezone"])
+        return PlaybackMatrix(timestamps, meta["attribute_ids"], values)
+
+    def writer(self):
+        return PlaybackCacheWriter(self)
+
+    def source_key(self, with_hash=True):
+        stat = self.csv_path.stat()
+        key = {
+            "version": CACHE_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "schema": [*self.schema.columns, self.schema.timestamp_format, str(self.schema.value_dtype)],
+        }
+        if with_hash:
+            key["sha256"] = self._hash()
+        return key
+
+    def _is_valid(self, meta):
+        try:
+            key = self.source_key(with_hash=False)
+        except OSError:
+            return False
+
+        cached = meta["source"]
+        if any(cached[name] != key[name] for name in ("version", "size", "schema")):
+            return False
+        if cached["mtime_ns"] == key["mtime_ns"]:
+            return True
+
+        # same size but touched, the content decides
+        if cached["sha256"] != self._hash():
+            return False
+        meta["source"]["mtime_ns"] = key["mtime_ns"]
+        self._write_meta(meta)
+        return True
+
+    def _hash(self):
+        sha = hashlib.sha256()
+        with open(self.csv_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        return sha.hexdigest()
+
+    def _read_meta(self):
+        try:
+            with open(self.folder / "meta.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        # every process writes its own temporary file, the last replace wins
+        tmp_path = self.folder / f"meta.json.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.folder / "meta.json")
+
+    def _remove_superseded_builds(self, current):
+        """remove the complete builds other than current, the builds in progress still have a spool folder"""
+        for build in self.folder.iterdir():
+            if build.is_dir() and build.name != current and not (build / "spool").exists():
+                # a reader that memory mapped the build keeps its data, on Windows the mapped files can't
+                # be removed yet and are removed by a later commit
+                shutil.rmtree(build, ignore_errors=True)
+
+
+class PlaybackCacheWriter:
+    """
+    Spools the blocks streamed by an IotCsvReader to disk and assembles the cache once the whole file
+    has been read, so that building the cache does not hold the whole matrix in memory. The blocks are
+    spooled and assembled in a build folder of this writer, which commit() publishes.
+    """
+
+    def __init__(self, cache: PlaybackCache):
+        self.cache = cache
+        self.build = f"build-{os.getpid()}-{uuid.uuid4().hex}"
+        self._folder = cache.folder / self.build
+        self._spool = self._folder / "spool"
+        self._blocks = []
+        self._timezone = None
+        self._spool.mkdir(parents=True)
+
+    def add(self, matrix: PlaybackMatrix):
+        path = self._spool / f"{len(self._blocks)}.npy"
+        np.save(path, matrix.values)
+        timestamps = matrix.timestamps
+        if timestamps.tz is not None:
+            self._timezone = str(timestamps.tz)
+            timestamps = timestamps.tz_convert("UTC").tz_localize(None)
+        np.save(path.with_suffix(".ts.npy"), timestamps.as_unit("ns").asi8)
+        self._blocks.append((path, len(matrix), len(matrix.attribute_ids)))
+
+    def commit(self, attribute_ids):
+        folder = self._folder
+        # hash before assembling, the source must not change while it is cached
+        source = self.cache.source_key()
+        ticks = sum(rows for _, rows, _ in self._blocks)
+
+        values = np.lib.format.open_memmap(folder / "values.npy", mode="w+", shape=(ticks, len(attribute_ids)))
+        timestamps = np.empty(ticks, dtype=np.int64)
+        row = 0
+        for path, rows, columns in self._blocks:
+            values[row : row + rows, :columns] = np.load(path)
+            values[row : row + rows, columns:] = np.nan
+            timestamps[row : row + rows] = np.load(path.with_suffix(".ts.npy"))
+            row += rows
+        values.flush()
+        del values
+        np.save(folder / "timestamps.npy", timestamps)
+        shutil.rmtree(self._spool, ignore_errors=True)
+
+        # the meta data is written last, a partial cache is never valid
+        self.cache._write_meta(
+            {"source": source, "attribute_ids": list(attribute_ids), "timezone": self._timezone, "build": self.build}
+        )
+        self.cache._remove_superseded_builds(self.build)
+
+    def abort(self):
+        shutil.rmtree(self._folder, ignore_errors=True)
@@ -0,0 +1,48 @@
+import numpy as np
+
+
+class PlaybackMatrix:
+    """
+    Dense playback data for a single device, precomputed from the long format CSV readings.
+
+    values holds one row per tick and one column per attribute, attribute_ids maps the column
+    index to the attribute id. Attributes without a reading in a tick are NaN.
+    """
+
+    def __init__(self, timestamps, attribute_ids, values):
+        self.timestamps = timestamps
+        self.attribute_ids = list(attribute_ids)
+        self.values = values
+
+    @classmethod
+    def from_frame(cls, data, schema, attribute_ids=None):
+        """
+        Pivots the readings of a data frame with the schema columns into a matrix. The timestamps must
+        already be parsed, attribute_ids fixes the column order and defaults to the order of appearance.
+        """
+        if attribute_ids is None:
+            attribute_ids = data[schema.id_column].unique()
+
+        # the last reading wins if an attribute is reported more than once in a tick
+        pivoted = data.drop_duplicates([schema.timestamp_column, schema.id_column], keep="last").pivot(
+            index=schema.timestamp_column, columns=schema.id_column, values=schema.value_column
+        )
+        pivoted = pivoted.reindex(columns=attribute_ids)
+        return cls(
+            pivoted.index,
+            attribute_ids,
+            np.ascontiguousarray(pivoted.to_numpy(dtype=np.float64, na_value=np.nan)),
+        )
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        """yields the (timestamp, values) of each tick, values is a row view of the matrix"""
+        return zip(self.timestamps, self.values)
+
+    @staticmethod
+    def present(values):
+        """returns the column indices and the values of the attributes that have a reading in the tick"""
+        columns = np.flatnonzero(~np.isnan(values))
+        return columns.tolist(), values[columns].tolist()
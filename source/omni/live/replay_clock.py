@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+
+class ReplayStats:
+    def __init__(self):
+        self.ticks = 0
+        self.missed = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def mean_lag(self):
+        return self.total_lag / self.ticks if self.ticks else 0.0
+
+    @property
+    def ticks_per_second(self):
+        return self.ticks / self.elapsed if self.elapsed > 0.0 else 0.0
+
+    def __str__(self):
+        return (
+            f"ticks: {self.ticks}, missed deadlines: {self.missed}, "
+            f"lag mean: {self.mean_lag * 1000.0:.2f} ms max: {self.max_lag * 1000.0:.2f} ms, "
+            f"rate: {self.ticks_per_second:.1f} ticks/s"
+        )
+
+
+class ReplayClock:
+    """
+    Paces the replay of historical data against deadlines on the monotonic clock.
+
+    The deadline of a tick is derived from its offset to the first tick, so the time spent writing
+    a tick does not accumulate as drift. speed scales the replay, e.g. 10.0 replays ten times faster
+    than recorded. With max_rate the ticks are not paced at all, which is useful for load testing.
+
+    A tick that is reached more than tolerance seconds after its deadline is counted as missed,
+    which means the writer can't keep up with the replay speed.
+    """
+
+    def __init__(self, speed=1.0, max_rate=False, tolerance=0.005):
+        if speed <= 0.0:
+            raise ValueError(f"The replay speed must be positive: {speed}")
+        self.speed = speed
+        self.max_rate = max_rate
+        self.tolerance = tolerance
+        self.stats = ReplayStats()
+        self._origin = None
+
+    def start(self):
+        self.stats = ReplayStats()
+        self._origin = time.monotonic()
+
+    def delay(self, offset):
+        """the seconds wait() would sleep until the deadline of the tick offset seconds after the first tick"""
+        if self.max_rate or self._origin is None:
+            return 0.0
+        return max(self._origin + offset / self.speed - time.monotonic(), 0.0)
+
+    def wait(self, offset):
+        """waits until the deadline of the tick offset seconds after the first tick"""
+        delay = self._advance(offset)
+        if delay > 0.0:
+            time.sleep(delay)
+        self.stats.elapsed = time.monotonic() - self._origin
+
+    async def wait_async(self, offset):
+        """like wait() without blocking the event loop, always yields so other tasks run at max rate"""
+        delay = self._advance(offset)
+        await asyncio.sleep(delay)
+        self.stats.elapsed = time.monotonic() - self._origin
+
+    def _advance(self, offset):
+        """counts the tick and returns the seconds until its deadline"""
+        if self._origin is None:
+            self.start()
+
+        stats = self.stats
+        stats.ticks += 1
+        if self.max_rate:
+            return 0.0
+        now = time.monotonic()
+        deadline = self._origin + offset / self.speed
+        if now < deadline:
+            return deadline - now
+        lag = now - deadline
+        stats.total_lag += lag
+        stats.max_lag = max(stats.max_lag, lag)
+        if lag > self.tolerance:
+            stats.missed += 1
+        return 0.0
@@ -0,0 +1,82 @@
+import multiprocessing
+import queue
+
+
+def partition_devices(weights, shards):
+    """
+    Splits the devices into at most shards groups of about the same total weight, e.g. the size of
+    their data, by assigning the heaviest devices first to the lightest group.
+    """
+    groups = [[] for _ in range(min(shards, len(weights)))]
+    totals = [0] * len(groups)
+    for device in sorted(weights, key=lambda device: (-weights[device], device)):
+        lightest = totals.index(min(totals))
+        groups[lightest].append(device)
+        totals[lightest] += weights[device]
+    return groups
+
+
+class ShardMetrics:
+    def __init__(self, shard, devices, replay_stats, coalescing_stats):
+        self.shard = shard
+        self.devices = devices
+        self.ticks = replay_stats.ticks
+        self.missed = replay_stats.missed
+        self.elapsed = replay_stats.elapsed
+        self.updates = coalescing_stats.updates
+        self.written = coalescing_stats.written
+        self.flushes = coalescing_stats.flushes
+        self.flush_time = coalescing_stats.total_flush_time
+
+    @property
+    def values_per_second(self):
+        return self.written / self.elapsed if self.elapsed > 0.0 else 0.0
+
+    def __str__(self):
+        flushes = max(self.flushes, 1)
+        return (
+            f"shard {self.shard}: devices: {len(self.devices)}, ticks: {self.ticks}, "
+            f"missed deadlines: {self.missed}, values written: {self.written}, "
+            f"rate: {self.values_per_second:.1f} values/s, flushes: {self.flushes}, "
+            f"flush time mean: {self.flush_time / flushes * 1000.0:.2f} ms"
+        )
+
+
+class ShardSupervisor:
+    """
+    Runs target(shard, *args, metrics) in one worker process per shard and collects the ShardMetrics
+    the workers put on the metrics queue.
+
+    The workers are spawned rather than forked, so that every process initializes its own omni.client
+    and USD state. A worker that exits with an error fails the run once all the workers have exited.
+    """
+
+    def __init__(self, target, shard_args):
+        self.target = target
+        self.shard_args = shard_args
+
+    def run(self):
+        context = multiprocessing.get_context("spawn")
+        metrics_queue = context.Queue()
+        processes = [
+            context.Process(target=self.target, args=(shard, *args, metrics_queue), name=f"shard_{shard}")
+            for shard, args in enumerate(self.shard_args)
+        ]
+        for process in processes:
+            process.start()
+
+        metrics = []
+        while len(metrics) < len(processes):
+            try:
+                metrics.append(metrics_queue.get(timeout=1.0))
+            except queue.Empty:
+                # a worker that died without reporting would keep the supervisor waiting
+                if not any(process.is_alive() for process in processes):
+                    break
+        for process in processes:
+            process.join()
+
+        failed = [process.name for process in processes if process.exitcode != 0]
+        if failed:
+            raise Exception(f"The shard workers failed: {', '.join(failed)}")
+        return sorted(metrics, key=lambda shard_metrics: shard_metrics.shard)
@@ -0,0 +1,203 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from typing import NamedTuple
+
+import omni.client
+from pxr import Sdf
+
+
+class StorageStats:
+    def __init__(self):
+        self.flushes = 0
+        self.layers_saved = 0
+        self.total_flush_time = 0.0
+        self.max_flush_time = 0.0
+
+    def record(self, elapsed, layers_saved=0):
+        self.flushes += 1
+        self.layers_saved += layers_saved
+        self.total_flush_time += elapsed
+        self.max_flush_time = max(self.max_flush_time, elapsed)
+
+    def __str__(self):
+        flushes = max(self.flushes, 1)
+        return (
+            f"flushes: {self.flushes}, layers saved: {self.layers_saved}, "
+            f"flush time mean: {self.total_flush_time / flushes * 1000.0:.2f} ms "
+            f"max: {self.max_flush_time * 1000.0:.2f} ms"
+        )
+
+
+class NucleusStorage:
+    """
+    The storage calls of the connector on a Nucleus server, the live layers are synchronized by
+    omni.client.live_process().
+    """
+
+    name = "nucleus"
+    live_extension = ".live"
+
+    def __init__(self):
+        self.stats = StorageStats()
+
+    def user_folder(self, host, user):
+        return f"omniverse://{host}/Users/{user}"
+
+    def make_url(self, base_url, path):
+        """url of path on the server of base_url, an omni.client.Url"""
+        return omni.client.make_url(base_url.scheme, base_url.user, base_url.host, base_url.port, path)
+
+    async def list_async(self, url):
+        return await omni.client.list_async(url)
+
+    async def read_file_async(self, url):
+        return await omni.client.read_file_async(url)
+
+    async def write_file_async(self, url, content):
+        return await omni.client.write_file_async(url, content)
+
+    async def copy_async(self, src_url, dst_url, behavior, message=""):
+        return await omni.client.copy_async(src_url, dst_url, behavior=behavior, message=message)
+
+    async def get_server_info_async(self, url):
+        return await omni.client.get_server_info_async(url)
+
+    def find_or_open_layer(self, url):
+        return Sdf.Layer.FindOrOpen(url)
+
+    def create_layer(self, url):
+        return Sdf.Layer.CreateNew(url)
+
+    def live_process(self):
+        start = time.perf_counter()
+        omni.client.live_process()
+        self.stats.record(time.perf_counter() - start)
+
+
+class LocalServerInfo(NamedTuple):
+    username: str
+
+
+class LocalListEntry(NamedTuple):
+    relative_path: str
+    size: int
+    modified_time: float
+    flags: int
+
+
+class LocalStorage:
+    """
+    Stand-in for a Nucleus server in a local folder, so that the connector can be tested and profiled
+    without a server, e.g. on CI.
+
+    The URLs are paths below folder. Live layers are regular .live.usdc layers, live_process()
+    imitates the live delta flushes by saving the live layers with unsaved edits, every flush is
+    counted and timed in stats. Only one connector process should write to a live layer.
+    """
+
+    name = "local"
+    live_extension = ".live.usdc"
+
+    def __init__(self, folder, username="ov"):
+        self.folder = os.path.abspath(folder)
+        self.username = username
+        self.stats = StorageStats()
+
+    def user_folder(self, host, user):
+        return f"{self.folder}/{host}/Users/{user}"
+
+    def make_url(self, base_url, path):
+        return path
+
+    async def list_async(self, url):
+        return await self._run_blocking(self._list, url)
+
+    async def read_file_async(self, url):
+        return await self._run_blocking(self._read_file, url)
+
+    async def write_file_async(self, url, content):
+        return await self._run_blocking(self._write_file, url, content)
+
+    async def copy_async(self, src_url, dst_url, behavior, message=""):
+        return await self._run_blocking(self._copy, src_url, dst_url, behavior)
+
+    async def get_server_info_async(self, url):
+        return omni.client.Result.OK, LocalServerInfo(self.username)
+
+    def find_or_open_layer(self, url):
+        # FindOrOpen raises for a missing local file, the Nucleus resolver returns None
+        return Sdf.Layer.FindOrOpen(url) if os.path.exists(url) else None
+
+    def create_layer(self, url):
+        os.makedirs(os.path.dirname(url), exist_ok=True)
+        return Sdf.Layer.CreateNew(url)
+
+    def live_process(self):
+        start = time.perf_counter()
+        saved = 0
+        for layer in Sdf.Layer.GetLoadedLayers():
+            if layer.dirty and layer.identifier.endswith(self.live_extension):
+                layer.Save()
+                saved += 1
+        self.stats.record(time.perf_counter() - start, saved)
+
+    @staticmethod
+    async def _run_blocking(function, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    @staticmethod
+    def _list(url):
+        if not os.path.isdir(url):
+            return omni.client.Result.ERROR_NOT_FOUND, []
+        entries = []
+        for entry in os.scandir(url):
+            stat = entry.stat()
+            flags = omni.client.ItemFlags.CAN_HAVE_CHILDREN if entry.is_dir() else omni.client.ItemFlags.READABLE_FILE
+            entries.append(LocalListEntry(entry.name, stat.st_size, stat.st_mtime, flags))
+        return omni.client.Result.OK, entries
+
+    @staticmethod
+    def _read_file(url):
+        try:
+            with open(url, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return omni.client.Result.ERROR_NOT_FOUND, None, None
+        return omni.client.Result.OK, str(os.stat(url).st_mtime_ns), content
+
+    @staticmethod
+    def _write_file(url, content):
+        os.makedirs(os.path.dirname(url), exist_ok=True)
+        with open(url, "wb") as f:
+            f.write(memoryview(content))
+        return omni.client.Result.OK
+
+    @staticmethod
+    def _copy(src_url, dst_url, behavior):
+        src = src_url[len("file:") :] if src_url.startswith("file:") else src_url
+        if not os.path.exists(src):
+            return omni.client.Result.ERROR_NOT_FOUND
+        if os.path.exists(dst_url) and behavior == omni.client.CopyBehavior.ERROR_IF_EXISTS:
+            return omni.client.Result.ERROR_ALREADY_EXISTS
+        if os.path.isdir(src):
+            shutil.copytree(src, dst_url, dirs_exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(dst_url), exist_ok=True)
+            shutil.copyfile(src, dst_url)
+        return omni.client.Result.OK
+
+
+def create_storage(spec, username="ov"):
+    """
+    storage of a "nucleus" or "local[:folder]" spec, the local folder defaults to iot-samples-storage
+    in the temp folder
+    """
+    name, _, folder = spec.partition(":")
+    if name == NucleusStorage.name:
+        return NucleusStorage()
+    if name == LocalStorage.name:
+        return LocalStorage(folder or os.path.join(tempfile.gettempdir(), "iot-samples-storage"), username)
+    raise Exception(f"Unknown storage {spec}, expected nucleus or local[:folder].")
@@ -0,0 +1,75 @@
+import numpy as np
+from pxr import Sdf
+
+from .attribute_write_plan import TIMESTAMP_ATTRIBUTE
+
+
+class TimeSampleBackfill:
+    """
+    Writes historical IoT readings as time samples on the attribute specs of the /iot/{topic} prims.
+
+    The device ticks are buffered and written per attribute when flush() is called, the time code of
+    a tick is its offset in seconds to start_time multiplied by time_codes_per_second. The samples are
+    still set one at a time with Layer.SetTimeSample, at the same cost per sample as a live write, the
+    batch only groups them in a single change block so that the change notices are sent once per flush.
+    Only the samples of the batch are set, so the samples of the previous batches are neither copied
+    nor sent again as live deltas. The attribute specs must exist in the layer.
+    """
+
+    def __init__(self, layer: Sdf.Layer, start_time, time_codes_per_second=1.0):
+        self.layer = layer
+        self.start_time = start_time
+        self.time_codes_per_second = time_codes_per_second
+        self.start_time_code = None
+        self.end_time_code = None
+        self.samples_written = 0
+        self._pending = {}
+        self._pending_ticks = 0
+
+    @property
+    def pending_ticks(self):
+        return self._pending_ticks
+
+    def add(self, tick):
+        """buffer an IotDeviceTick"""
+        time_code = (tick.timestamp - self.start_time).total_seconds() * self.time_codes_per_second
+        time_codes, rows, _ = self._pending.get(tick.topic, ([], [], None))
+        time_codes.append(time_code)
+        rows.append(tick.values)
+        # the attribute ids of a device only grow, the latest ones cover all the buffered rows
+        self._pending[tick.topic] = (time_codes, rows, tick.attribute_ids)
+        self._pending_ticks += 1
+
+    def flush(self):
+        """write the buffered ticks in a single change block"""
+        with Sdf.ChangeBlock():
+            for topic, (time_codes, rows, attribute_ids) in self._pending.items():
+                self._write_device(topic, np.asarray(time_codes), rows, attribute_ids)
+        self._pending = {}
+        self._pending_ticks = 0
+
+    def _write_device(self, topic, time_codes, rows, attribute_ids):
+        values = np.full((len(rows), len(attribute_ids)), np.nan)
+        for row, row_values in enumerate(rows):
+            values[row, : len(row_values)] = row_values
+
+        prim_path = Sdf.Path(f"/iot/{topic}")
+        self._write_samples(prim_path, TIMESTAMP_ATTRIBUTE, time_codes, time_codes / self.time_codes_per_second)
+        for column, id in enumerate(attribute_ids):
+            present = ~np.isnan(values[:, column])
+            if present.any():
+                self._write_samples(prim_path, id, time_codes[present], values[present, column])
+
+        start, end = float(time_codes[0]), float(time_codes[-1])
+        self.start_time_code = start if self.start_time_code is None else min(self.start_time_code, start)
+        self.end_time_code = end if self.end_time_code is None else max(self.end_time_code, end)
+
+    def _write_samples(self, prim_path, id, time_codes, values):
+        attr = self.layer.GetAttributeAtPath(prim_path.AppendProperty(id))
+        if not attr:
+            raise Exception(f"Could not find attribute {prim_path}.{id}.")
+
+        path = attr.path
+        for time_code, value in zip(time_codes.tolist(), values.tolist()):
+            self.layer.SetTimeSample(path, time_code, value)
+        self.samples_written += len(values)
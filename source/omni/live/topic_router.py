@@ -0,0 +1,55 @@
+import collections
+
+from .payload_codec import parse_payload_topic
+
+
+class TopicRouter:
+    """
+    Routes the MQTT topics of a wildcard subscription to the devices of the connector.
+
+    Topics of the form {prefix}{device}[/fmt/{payload format}] are parsed the first time they are seen,
+    after that a message is routed with a single dictionary lookup. create_device is called once for
+    each unknown device name and returns the device, or None to ignore the device. Topics that don't
+    start with prefix are ignored. Only the routes of devices are kept for good, the ignored topics of a
+    wildcard subscription are kept in an LRU of ignored_capacity topics.
+    """
+
+    def __init__(self, create_device, prefix="iot/", ignored_capacity=1024):
+        self.prefix = prefix
+        self.devices = {}
+        self.ignored = 0
+        self.ignored_capacity = ignored_capacity
+        self._create_device = create_device
+        self._routes = {}
+        self._ignored_routes = collections.OrderedDict()
+
+    def add(self, name, device):
+        self.devices[name] = device
+
+    def route(self, topic):
+        """returns (device, payload format), device is None for ignored topics"""
+        route = self._routes.get(topic)
+        if route is not None:
+            return route
+        route = self._ignored_routes.pop(topic, None) or self._resolve(topic)
+        if route[0] is None:
+            self.ignored += 1
+            # reinserted as the most recent topic, the least recent one is evicted
+            self._ignored_routes[topic] = route
+            if len(self._ignored_routes) > self.ignored_capacity:
+                self._ignored_routes.popitem(last=False)
+        else:
+            self._routes[topic] = route
+        return route
+
+    def _resolve(self, topic):
+        base, format = parse_payload_topic(topic)
+        if not base.startswith(self.prefix):
+            return None, format
+        name = base[len(self.prefix) :]
+        device = self.devices.get(name)
+        if device is None:
+            device = self._create_device(name)
+            if device is not None:
+                self.devices[name] = device
+        return device, format
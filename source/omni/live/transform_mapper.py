@@ -0,0 +1,269 @@
+import json
+import math
+import time
+from typing import NamedTuple
+
+import numpy as np
+from pxr import Gf, Sdf, UsdGeom, Vt
+
+from .attribute_write_plan import AttributeWritePlan
+
+# the attribute of every target and the position of its first channel in the channels of a prim
+TRANSFORM_TARGETS = {
+    "translate": ("xformOp:translate", 0),
+    "rotate": ("xformOp:rotateXYZ", 3),
+    "scale": ("xformOp:scale", 6),
+    "color": ("primvars:displayColor", 9),
+}
+CHANNEL_AXES = {"x": 0, "y": 1, "z": 2, "r": 0, "g": 1, "b": 2}
+CHANNELS_PER_PRIM = 3 * len(TRANSFORM_TARGETS)
+
+
+class TransformMapping(NamedTuple):
+    # the value of the IoT attribute /iot/{device}.{attribute} drives the target channel of the prim,
+    # e.g. "rotate.y", as clip(value * scale + offset, min, max)
+    device: str
+    attribute: str
+    prim: str
+    target: str
+    scale: float = 1.0
+    offset: float = 0.0
+    min: float = -math.inf
+    max: float = math.inf
+    # fraction of the distance to the mapped value that is left after every evaluation, 0 jumps to it
+    smoothing: float = 0.0
+
+
+def parse_transform_mappings(rules):
+    """
+    mappings of a list of rule dicts with the fields of TransformMapping, e.g.
+    {"device": "A08_PR_NVD_01", "attribute": "Velocity", "prim": "/World/cube", "target": "rotate.y", "scale": 36}
+    a target without an axis, e.g. "scale", drives all three channels
+    """
+    mappings = []
+    for rule in rules:
+        unknown = set(rule) - set(TransformMapping._fields)
+        missing = [field for field in TransformMapping._fields[:4] if field not in rule]
+        if unknown or missing:
+            raise Exception(f"Invalid transform mapping {rule}, unknown: {sorted(unknown)}, missing: {missing}.")
+        target, _, axis = rule["target"].partition(".")
+        if target not in TRANSFORM_TARGETS or (axis and axis not in CHANNEL_AXES):
+            raise Exception(
+                f"Unknown target {rule['target']} of the transform mapping {rule}, "
+                f"expected {', '.join(TRANSFORM_TARGETS)} with an optional .x, .y, .z or .r, .g, .b axis."
+            )
+        fields = {field: value for field, value in rule.items() if value is not None}
+        for field in TransformMapping._fields[4:]:
+            if field in fields:
+                fields[field] = float(fields[field])
+        mapping = TransformMapping(**fields)
+        if not 0.0 <= mapping.smoothing < 1.0:
+            raise Exception(f"The smoothing of the transform mapping {rule} must be in [0, 1).")
+        if axis:
+            mappings.append(mapping)
+        else:
+            axes = "rgb" if target == "color" else "xyz"
+            mappings.extend(mapping._replace(target=f"{target}.{axis}") for axis in axes)
+    return mappings
+
+
+def load_transform_mappings(path):
+    """mappings of a JSON file with a list of rules, see parse_transform_mappings"""
+    with open(path) as f:
+        return parse_transform_mappings(json.load(f))
+
+
+class TransformMapperStats:
+    def __init__(self, bindings):
+        self.bindings = bindings
+        self.evaluations = 0
+        self.updated = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def __str__(self):
+        evaluations = max(self.evaluations, 1)
+        return (
+            f"bindings: {self.bindings}, evaluations: {self.evaluations}, attributes updated: {self.updated}, "
+            f"evaluate time mean: {self.total_time / evaluations * 1000.0:.3f} ms "
+            f"max: {self.max_time * 1000.0:.3f} ms"
+        )
+
+
+class TransformMapper:
+    """
+    Drives the translation, rotation, scale and display color of prims with IoT values, following a
+    list of TransformMapping rules.
+
+    The rules are compiled into NumPy arrays of their source, target channel, scale, offset, limits and
+    smoothing, so evaluate() computes all the bindings with a handful of vectorized operations instead
+    of Python code per binding. The source values are set by update() from the columns of a device tick
+    or by update_items() from (attribute id, value) pairs, the last value of every source is kept.
+
+    The channels of a prim are its translate, rotateXYZ and scale xform ops and its displayColor. They
+    are created in the edit target layer when the mapper is constructed. Only the attributes whose
+    channels changed are written, with one AttributeWritePlan per prim, either through a
+    CoalescingWriter by apply(), so that they are flushed together with the IoT values, or in a single
+    change block by write().
+    """
+
+    def __init__(self, stage, mappings, tolerance=1e-4):
+        self.mappings = list(mappings)
+        self.tolerance = tolerance
+        self.stats = TransformMapperStats(len(self.mappings))
+
+        sources = {}
+        prims = {}
+        targets = {}
+        for mapping in self.mappings:
+            sources.setdefault((mapping.device, mapping.attribute), len(sources))
+            prims.setdefault(mapping.prim, len(prims))
+            targets.setdefault(mapping.prim, set()).add(mapping.target.partition(".")[0])
+        self._sources = sources
+        self._inputs = np.full(len(sources), np.nan)
+        # device -> (number of attribute ids, columns, sources) of the columns that are mapped
+        self._device_columns = {}
+
+        channels = []
+        for mapping in self.mappings:
+            target, _, axis = mapping.target.partition(".")
+            channels.append(prims[mapping.prim] * CHANNELS_PER_PRIM + TRANSFORM_TARGETS[target][1] + CHANNEL_AXES[axis])
+        unique, counts = np.unique(channels, return_counts=True)
+        if np.any(counts > 1):
+            duplicates = [mapping for mapping, channel in zip(self.mappings, channels) if channel in unique[counts > 1]]
+            raise Exception(f"Several transform mappings drive the same channel: {duplicates}")
+        self._source = np.array(
+            [sources[(mapping.device, mapping.attribute)] for mapping in self.mappings], dtype=np.int64
+        )
+        self._channel = np.array(channels, dtype=np.int64)
+        self._scale = np.array([mapping.scale for mapping in self.mappings])
+        self._offset = np.array([mapping.offset for mapping in self.mappings])
+        self._min = np.array([mapping.min for mapping in self.mappings])
+        self._max = np.array([mapping.max for mapping in self.mappings])
+        self._smoothing = np.array([mapping.smoothing for mapping in self.mappings])
+
+        # the current value of every channel, the channels that are not mapped are never written
+        self._values = np.zeros((len(prims), CHANNELS_PER_PRIM))
+        self._attribute_ids = [attribute_id for attribute_id, _channel in TRANSFORM_TARGETS.values()]
+        # the Gf vector type of every attribute, the values are converted before they are written
+        self._vector_types = {}
+        self.write_plans = []
+        edit_target = stage.GetEditTarget()
+        for prim_path, index in prims.items():
+            prim = stage.GetPrimAtPath(prim_path)
+            if not prim:
+                raise Exception(f"Could not find the prim {prim_path} of the transform mappings.")
+            attribute_ids = []
+            for target, (attribute_id, channel) in TRANSFORM_TARGETS.items():
+                if target in targets[prim_path]:
+                    value, vector_type = self._author(prim, target)
+                    self._values[index, channel : channel + 3] = value
+                    self._vector_types[index * len(TRANSFORM_TARGETS) + channel // 3] = vector_type
+                    attribute_ids.append(attribute_id)
+            self.write_plans.append(
+                AttributeWritePlan(edit_target.GetLayer(), edit_target.MapToSpecPath(prim.GetPath()), attribute_ids)
+            )
+
+    def update(self, device, attribute_ids, values):
+        """set the sources of a device from its values by column, NaN for no reading, like a device tick"""
+        count, columns, sources = self._device_columns.get(device, (None, None, None))
+        if count != len(attribute_ids):
+            mapped = [
+                (column, self._sources[(device, id)])
+                for column, id in enumerate(attribute_ids)
+                if (device, id) in self._sources
+            ]
+            columns = np.array([column for column, _source in mapped], dtype=np.int64)
+            sources = np.array([source for _column, source in mapped], dtype=np.int64)
+            self._device_columns[device] = (len(attribute_ids), columns, sources)
+        if len(columns):
+            values = np.asarray(values, dtype=np.float64)[columns]
+            present = ~np.isnan(values)
+            self._inputs[sources[present]] = values[present]
+
+    def update_items(self, device, items):
+        """set the sources of a device from (attribute id, value) pairs, values that are not numbers are ignored"""
+        for id, value in items:
+            source = self._sources.get((device, id))
+            if source is not None and isinstance(value, (int, float)) and not isinstance(value, bool):
+                self._inputs[source] = value
+
+    def evaluate(self):
+        """
+        evaluate all the bindings, returns the (write plan, [(attribute id, value)]) of the prims whose
+        attributes changed
+        """
+        start = time.perf_counter()
+        inputs = self._inputs[self._source]
+        values = self._values.reshape(-1)
+        current = values[self._channel]
+        target = np.clip(inputs * self._scale + self._offset, self._min, self._max)
+        new = target + (current - target) * self._smoothing
+        # settle on the mapped value once the smoothing is within the tolerance
+        new = np.where(np.abs(new - target) <= self.tolerance, target, new)
+        # NaN inputs have no reading yet and compare as not changed
+        changed = ~np.isnan(new) & (new != current)
+        channels = self._channel[changed]
+        values[channels] = new[changed]
+
+        groups = np.unique(channels // 3)
+        updates = {}
+        vector_types = self._vector_types
+        for group, value in zip(groups.tolist(), self._values.reshape(-1, 3)[groups].tolist()):
+            prim, target = divmod(group, len(TRANSFORM_TARGETS))
+            value = vector_types[group](*value)
+            if target == len(TRANSFORM_TARGETS) - 1:
+                # the displayColor primvar is an array with a single color
+                value = Vt.Vec3fArray([value])
+            updates.setdefault(prim, []).append((self._attribute_ids[target], value))
+
+        elapsed = time.perf_counter() - start
+        self.stats.evaluations += 1
+        self.stats.updated += len(groups)
+        self.stats.total_time += elapsed
+        self.stats.max_time = max(self.stats.max_time, elapsed)
+        return [(self.write_plans[prim], items) for prim, items in updates.items()]
+
+    def apply(self, writer):
+        """evaluate and merge the changed attributes into the CoalescingWriter"""
+        for write_plan, items in self.evaluate():
+            writer.update(write_plan, items)
+
+    def write(self):
+        """evaluate and write the changed attributes in a single change block"""
+        with Sdf.ChangeBlock():
+            for write_plan, items in self.evaluate():
+                write_plan.write_items(items)
+
+    def revoke(self):
+        for write_plan in self.write_plans:
+            write_plan.revoke()
+
+    @staticmethod
+    def _author(prim, target):
+        """
+        the value and the Gf vector type of the target attribute of the prim, which is authored in the edit
+        target layer
+        """
+        if target == "color":
+            primvars = UsdGeom.PrimvarsAPI(prim)
+            primvar = primvars.GetPrimvar("displayColor")
+            if not primvar:
+                primvar = primvars.CreatePrimvar(
+                    "displayColor", Sdf.ValueTypeNames.Color3fArray, UsdGeom.Tokens.constant
+                )
+            colors = primvar.Get()
+            value = tuple(colors[0]) if colors else (1.0, 1.0, 1.0)
+            primvar.Set([value])
+            return value, Gf.Vec3f
+
+        attribute_id = TRANSFORM_TARGETS[target][0]
+        xformable = UsdGeom.Xformable(prim)
+        op = next((op for op in xformable.GetOrderedXformOps() if op.GetOpName() == attribute_id), None)
+        if op is None:
+            add_op = {"translate": xformable.AddTranslateOp, "rotate": xformable.AddRotateXYZOp}
+            op = add_op.get(target, xformable.AddScaleOp)()
+        value = op.Get()
+        value = tuple(value) if value is not None else ((1.0, 1.0, 1.0) if target == "scale" else (0.0, 0.0, 0.0))
+        op.Set(value)
+        return value, op.GetTypeName().type.pythonClass
@@ -27,8 +27,16 @@ import os
 import omni.client
 from pxr import Usd, Sdf
 from pathlib import Path
-import time
-from omni.live import LiveEditSession, LiveCube, getUserNameFromToken
+from omni.live import (
+    LiveEditSession,
+    LiveCube,
+    CubeAnimator,
+    FrameScheduler,
+    LogCapture,
+    create_storage,
+    parse_log_level,
+    getUserNameFromToken,
+)
 
 OMNI_HOST = os.environ.get("OMNI_HOST", "localhost")
 OMNI_USER = os.environ.get("OMNI_USER", "ov")
@@ -37,16 +45,36 @@ if OMNI_USER.lower() == "omniverse":
 elif OMNI_USER.lower() == "$omni-api-token":
     OMNI_USER = getUserNameFromToken(os.environ.get("OMNI_PASS"))
 
-BASE_FOLDER = "omniverse://" + OMNI_HOST + "/Users/" + OMNI_USER + "/iot-samples"
+# IOT_STORAGE=local[:folder] keeps the stage and the live session in a local folder instead of Nucleus,
+# e.g. to profile the connector offline, the live layer flushes are saved to disk
+STORAGE = create_storage(os.environ.get("IOT_STORAGE", "nucleus"), OMNI_USER)
+BASE_FOLDER = STORAGE.user_folder(OMNI_HOST, OMNI_USER) + "/iot-samples"
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 CONTENT_DIR = Path(SCRIPT_DIR).resolve().parents[1].joinpath("content")
 
-messages = []
+# IOT_CUBES > 1 animates that many cubes as the instances of a single point instancer
+CUBES = int(os.environ.get("IOT_CUBES", "1"))
 
+# the frames are paced at IOT_FRAME_RATE for IOT_DURATION seconds, frames that can't be written in time
+# are skipped unless IOT_SKIP_FRAMES=0, the frame time histogram is written to IOT_FRAME_STATS_FILE as CSV
+FRAME_RATE = float(os.environ.get("IOT_FRAME_RATE", "30"))
+DURATION = float(os.environ.get("IOT_DURATION", "20"))
+SKIP_FRAMES = os.environ.get("IOT_SKIP_FRAMES", "1").lower() in ("1", "true", "yes")
+FRAME_STATS_FILE = os.environ.get("IOT_FRAME_STATS_FILE")
 
-def log_handler(thread, component, level, message):
-    # print(message)
-    messages.append((thread, component, level, message))
+# client log messages are kept in a ring buffer and printed on failure
+LOG_LEVEL = parse_log_level(os.environ.get("IOT_LOG_LEVEL", "warning"))
+LOG_CAPACITY = int(os.environ.get("IOT_LOG_CAPACITY", "1000"))
+LOG_RATE_LIMIT = int(os.environ.get("IOT_LOG_RATE_LIMIT", "100"))
+LOG_FILE = os.environ.get("IOT_LOG_FILE")
+
+
+def open_stage(stage_url):
+    try:
+        stage = Usd.Stage.Open(stage_url)
+    except:
+        stage = Usd.Stage.Open(STORAGE.create_layer(stage_url))
+    return stage
 
 
 async def initialize_async():
@@ -55,53 +83,57 @@ async def initialize_async():
     stage_folder = f"{BASE_FOLDER}/{stage_name}"
     stage_url = f"{stage_folder}/{stage_name}.usd"
 
-    try:
-        stage = Usd.Stage.Open(stage_url)
-    except:
-        stage = Usd.Stage.CreateNew(stage_url)
-
+    # open the stage while the live session is set up
+    live_session = LiveEditSession(stage_url, STORAGE)
+    stage, live_layer = await asyncio.gather(
+        asyncio.get_running_loop().run_in_executor(None, open_stage, stage_url),
+        live_session.ensure_exists(),
+    )
     if not stage:
         raise Exception(f"Could load the stage {stage_url}.")
 
-    live_session = LiveEditSession(stage_url)
-    live_layer = await live_session.ensure_exists()
-
     session_layer = stage.GetSessionLayer()
     session_layer.subLayerPaths.append(live_layer.identifier)
 
     # set the live layer as the edit target
     stage.SetEditTarget(live_layer)
     stage.DefinePrim("/World", "Xform")
-    omni.client.live_process()
+    STORAGE.live_process()
     return stage, live_layer
 
 
 def run(stage, live_layer):
-    # we assume that the file contains the data for single device
+    # play back the animation at FRAME_RATE for DURATION seconds
+    if CUBES > 1:
+        # the arrays of all the cubes are written in a single change block
+        animate = CubeAnimator(stage, CUBES).animate
+    else:
+        live_cube = LiveCube(stage)
+
+        def animate():
+            with Sdf.ChangeBlock():
+                live_cube.rotate()
 
-    # play back the data in at 30fps for 20 seconds
-    delay = 0.033
-    iterations = 600
-    live_cube = LiveCube(stage)
-    omni.client.live_process()
+    STORAGE.live_process()
 
-    for x in range(iterations):
-        with Sdf.ChangeBlock():
-            live_cube.rotate()
-        omni.client.live_process()
-        time.sleep(delay)
+    scheduler = FrameScheduler(FRAME_RATE, SKIP_FRAMES)
+    stats = scheduler.run(round(DURATION * FRAME_RATE), lambda frame: animate(), STORAGE.live_process)
+    print(f"Frames - {stats}")
+    print(stats.table())
+    if FRAME_STATS_FILE:
+        stats.export_csv(FRAME_STATS_FILE)
+    print(f"Storage {STORAGE.name} - {STORAGE.stats}")
 
 
 if __name__ == "__main__":
+    log_capture = LogCapture(LOG_CAPACITY, LOG_LEVEL, LOG_RATE_LIMIT, LOG_FILE)
     omni.client.initialize()
-    omni.client.set_log_level(omni.client.LogLevel.DEBUG)
-    omni.client.set_log_callback(log_handler)
+    log_capture.install()
     try:
         stage, live_layer = asyncio.run(initialize_async())
         run(stage, live_layer)
     except:
-        print("---- LOG MESSAGES ---")
-        print(*messages, sep="\n")
-        print("----")
+        log_capture.dump()
     finally:
+        log_capture.close()
         omni.client.shutdown()
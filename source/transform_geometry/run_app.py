@@ -29,6 +29,10 @@ parser.add_argument("--username", "-u", default=default_username)
 parser.add_argument("--password", "-p", default=default_password)
 parser.add_argument("--config", "-c", choices=["debug", "release"], default="release")
 parser.add_argument("--platform", default=CURRENT_PLATFORM)
+parser.add_argument("--cubes", type=int, help="number of cubes animated by a single point instancer")
+parser.add_argument("--rate", type=float, help="target frame rate, defaults to 30 fps")
+parser.add_argument("--duration", type=float, help="seconds to animate, defaults to 20")
+parser.add_argument("--storage", help='"local[:folder]" keeps the stage and the live session in a local folder')
 args = parser.parse_args()
 
 SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
@@ -63,6 +67,14 @@ os.environ["PYTHONPATH"] = os.pathsep + os.pathsep.join(EXTRA_PYTHON_PATHS)
 os.environ["OMNI_USER"] = args.username
 os.environ["OMNI_PASS"] = args.password
 os.environ["OMNI_HOST"] = args.server
+if args.storage:
+    os.environ["IOT_STORAGE"] = args.storage
+if args.cubes:
+    os.environ["IOT_CUBES"] = str(args.cubes)
+if args.rate:
+    os.environ["IOT_FRAME_RATE"] = str(args.rate)
+if args.duration:
+    os.environ["IOT_DURATION"] = str(args.duration)
 
 if PLATFORM_SYSTEM == "windows":
     PYTHON_EXE = DEPS_DIR.joinpath("python", "python")